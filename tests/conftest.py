@@ -0,0 +1,18 @@
+import json
+import os
+import sys
+import tempfile
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.py holds the bot's secrets and isn't in the repo, the defaults of getattr(config, ...) are enough here
+try:
+    import config
+except ImportError:
+    sys.modules['config'] = types.ModuleType('config')
+
+# the emoji catalog is loaded from the working directory when it's imported, give it a snapshot instead of the api
+os.chdir(tempfile.mkdtemp())
+with open('emoji_catalog.json', 'w') as f:
+    json.dump(['😂', '😇', '🙃', '😍', '🔥'], f, ensure_ascii=False)
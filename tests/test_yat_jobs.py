@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from yat_catalog import catalog
+from yat_jobs import ScanScheduler
+from yat_pattern import compile_pattern
+
+class FakeAPI:
+    """ every yat is available, records the ids in the order they were checked """
+
+    def __init__(self):
+        self.checked = []
+
+    async def iter_infos(self, emoji_ids, concurrency=10, retries=3):
+        for emoji_id in emoji_ids:
+            self.checked.append(emoji_id)
+            yield emoji_id, {'emoji_id': emoji_id, 'availability': 'Available', 'rhythm_score': 50}
+
+@pytest.fixture
+def emojis():
+    saved = list(catalog)
+    catalog.set_emojis(['😂', '😇', '🙃', '😍', '🔥'])
+    yield
+    catalog.set_emojis(saved)
+
+def make_scheduler(db_path, api):
+    scheduler = ScanScheduler(db_path=db_path)
+    scheduler.CHUNK_SIZE = 3
+    scheduler.yat_api = api
+    return scheduler
+
+def test_resume_after_restart_with_changed_catalog(emojis, tmp_path):
+    db_path = str(tmp_path / 'scan_jobs.db')
+    compiled = compile_pattern('AB🔥')
+    expected = list(compiled)
+    api = FakeAPI()
+
+    scheduler = make_scheduler(db_path, api)
+    job_id = scheduler.submit(1, 1, None, 'AB🔥', compiled)
+    asyncio.run(scheduler.run_chunk(scheduler.get_job(job_id)))
+
+    # restart after a catalog refresh: an emoji was removed, one was added and the order changed
+    catalog.set_emojis(['🦄', '🔥', '😍', '🙃', '😇'])
+    scheduler = make_scheduler(db_path, api)
+    job = scheduler.get_job(job_id)
+    while job['status'] == 'queued':
+        asyncio.run(scheduler.run_chunk(job))
+        job = scheduler.get_job(job_id)
+
+    assert api.checked == expected
+    assert job['status'] == 'done'
+    assert job['checked'] == job['total'] == len(expected)
+    assert [r['id'] for r in job['results']] == expected
@@ -1,8 +1,9 @@
 import requests
 import aiohttp
 import asyncio
-from multiprocessing import Pool
 import config
+from yat_cache import InfosCache
+from yat_http import client
 
 import logging
 import random
@@ -10,6 +11,9 @@ import time
 
 API_URL = "https://a.y.at"
 
+# shared by every YatAPI instance and the sync functions
+infos_cache = InfosCache(db_path=getattr(config, 'INFOS_CACHE_DB', None))
+
 def get_auth_headers():
     h = {'Accept': '*/*'}
     if config.YAT_API_KEY:
@@ -47,32 +51,22 @@ def test_proxy():
     else:
         print(r.json())
 
+# sync versions of the YatAPI methods for scripts and executor threads, they share its connections and rate limits
+
 def get_emoji_list():
-    path = API_URL + '/emoji'
-    r = requests.get(path, headers={'Accept': '*/*'})
-    if r.status_code == 200:
-        return r.json()
-    return False
+    return client.run_sync(yat_api.get_emoji_list())
 
 def get_infos(emoji_id):
-    path = API_URL + '/emoji_id/search?emoji_id={}'.format(emoji_id)
-    r = requests.get(path, headers={'Accept': '*/*'})
-    if r.status_code == 200:
-        return {'id': emoji_id, 'res': r.json().get('result')}
-    return {'id': emoji_id, 'res': False}
+    return {'id': emoji_id, 'res': client.run_sync(yat_api.get_infos(emoji_id))}
 
 def get_data(emoji_id):
-    path = API_URL + '/emoji_id/{}'.format(emoji_id)
-    r = requests.get(path, headers={'Accept': '*/*'})
-    if r.status_code == 200:
-        return r.json().get('result')
-    return False
+    return client.run_sync(yat_api.get_data(emoji_id))
 
 def fast_get_infos(ids):
-    if not ids:
-        return []
-    with Pool(min(10, len(ids)//2)) as p:
-        return p.map(get_infos, ids)
+    async def get_all():
+        return {emoji_id: infos async for emoji_id, infos in yat_api.iter_infos(ids, retries=0)}
+    res = client.run_sync(get_all())
+    return [{'id': emoji_id, 'res': res.get(emoji_id)} for emoji_id in ids]
 
 def is_emoji_out(emoji):
     random_emojis = [
@@ -95,35 +89,32 @@ def is_emoji_out(emoji):
     return False
 
 def get_recent_purchases():
-    path = API_URL + '/emoji_id/recent'
-    r = requests.get(path, headers={'Accept': '*/*'}, timeout=5)
-    if r.status_code != 200:
-        return False
-    return r.json().get('result')
+    return client.run_sync(yat_api.get_recent_purchases())
 
 class YatAPI:
     API_URL = "https://a.y.at"
 
-    def __init__(self):
-        self.aiosession = None
-
     async def get_metadata(self, token_id):
-        s = await self.get_aiosession()
         path = self.API_URL + '/nft_transfers/metadata/{}'.format(token_id)
-        async with s.get(path) as r:
-            if r.status != 200:
-                return False
-            return await r.json()
+        return await client.get_json(path)
     
     async def get_infos(self, emoji_id):
-        s = await self.get_aiosession()
+        return await infos_cache.get_or_fetch(emoji_id, lambda: self.fetch_infos(emoji_id))
+
+    async def fetch_infos(self, emoji_id):
         path = self.API_URL + '/emoji_id/search'
         params = {'emoji_id': emoji_id}
-        async with s.get(path, params=params) as r:
-            if r.status != 200:
-                return False
-            resp_json = await r.json()
-            return resp_json.get('result')
+        resp_json = await client.get_json(path, params=params)
+        if resp_json is False:
+            return False
+        return resp_json.get('result')
+
+    async def get_data(self, emoji_id):
+        path = self.API_URL + '/emoji_id/{}'.format(emoji_id)
+        resp_json = await client.get_json(path)
+        if resp_json is False:
+            return False
+        return resp_json.get('result')
 
     async def get_infos_bulk(self, emoji_ids):
         emoji_ids = tuple(emoji_ids) # support receiving sets
@@ -137,28 +128,78 @@ class YatAPI:
                 ret.append({'emoji_id': emoji_ids[i], 'result': infos})
         return ret
 
+    async def get_emoji_list(self):
+        path = self.API_URL + '/emoji'
+        return await client.get_json(path)
+
+    async def get_infos_retry(self, emoji_id, retries=3, backoff=0.5):
+        """ get_infos, retrying failures with exponential backoff and full jitter """
+        for attempt in range(retries + 1):
+            try:
+                infos = await self.get_infos(emoji_id)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                infos = False
+            if infos:
+                return infos
+            if attempt < retries:
+                await asyncio.sleep(random.uniform(0, backoff * 2 ** attempt))
+        return False
+
+    async def iter_infos(self, emoji_ids, concurrency=10, retries=3):
+        """ async iterator of (emoji_id, infos) in completion order, with at most concurrency requests at once.
+            emoji_ids can be any iterable (even a generator), it is consumed as the results come in """
+        emoji_ids = iter(emoji_ids)
+        queue = asyncio.Queue(maxsize=concurrency)
+        # set when the consumer is done, the workers it cancels don't need to (and can't always) end the stream
+        closed = False
+
+        async def worker():
+            try:
+                for emoji_id in emoji_ids:
+                    await queue.put((emoji_id, await self.get_infos_retry(emoji_id, retries=retries)))
+            except Exception:
+                logging.exception("Error while getting infos:")
+            finally:
+                # whatever stopped the worker, the consumer waits for its sentinel
+                if not closed:
+                    await queue.put(None)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+        running = len(workers)
+        try:
+            while running:
+                res = await queue.get()
+                if res is None:
+                    running -= 1
+                else:
+                    yield res
+        finally:
+            closed = True
+            for w in workers:
+                w.cancel()
+
     async def get_recent_purchases(self):
-        s = await self.get_aiosession()
         path = self.API_URL + '/emoji_id/recent'
-        async with s.get(path) as r:
-            if r.status != 200:
-                return False
-            resp_json = await r.json()
-            return resp_json.get('result')
-
-    # consider making a helper parent class for this and OpenseaFeeder
-    async def get_aiosession(self):
-        if self.aiosession is not None:
-            return self.aiosession
-        self.aiosession = aiohttp.ClientSession()
-        return self.aiosession
+        resp_json = await client.get_json(path)
+        if resp_json is False:
+            return False
+        return resp_json.get('result')
+
+    async def get_recent_purchases_conditional(self, etag=None):
+        """ (recent purchases, etag), the purchases are None if they didn't change since etag and False on errors """
+        path = self.API_URL + '/emoji_id/recent'
+        resp_json, etag = await client.get_conditional(path, etag)
+        if resp_json is None or resp_json is False:
+            return resp_json, etag
+        return resp_json.get('result'), etag
 
     async def close(self):
-        if self.aiosession is not None:
-            await self.aiosession.close()
+        # connections are shared by every YatAPI and owned by yat_http.client, nothing to close here
+        pass
 
+yat_api = YatAPI()
 
-def paste(s):
+async def paste(s):
     '''post s to pastebin and returns the link (yes this has nothing to do here)'''
     logging.info('posting to pastebin')
     url = "https://pastebin.com/api/api_post.php"
@@ -168,9 +209,9 @@ def paste(s):
         'api_paste_code': s,
         'api_paste_private': '1'
     }
-    r = requests.post(url, data=data)
-    logging.info('paste result: {}'.format(r.text))
-    return r.text
+    status, text = await client.post(url, data=data)
+    logging.info('paste result: {}'.format(text))
+    return text
     
 if __name__ == "__main__":
     print(get_info('🔥🔥🔥'))
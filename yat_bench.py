@@ -0,0 +1,59 @@
+import math
+import random
+import sys
+import timeit
+
+import regex
+from PIL import Image
+
+import yat_image
+import yat_utils
+from yat_catalog import catalog
+
+def report(name, number, seconds):
+    print('{}: {:.2f} ms per call ({} calls)'.format(name, seconds * 1000 / number, number))
+
+def make_background_putpixel():
+    # the old implementation of yat_image.make_background, kept as a baseline
+    image = Image.new('RGBA', (yat_image.WD, yat_image.HT))
+    innerColor = [200, 200, 255]
+    outerColor = [80, 80, 255]
+    for y in range(yat_image.HT):
+        for x in range(yat_image.WD):
+            d = math.sqrt((x - yat_image.WD/2) ** 2 + (y - yat_image.HT/2) ** 2) / (math.sqrt(2) * yat_image.WD/2)
+            image.putpixel((x, y), tuple(int(outerColor[i] * d + innerColor[i] * (1 - d)) for i in range(3)))
+    return image
+
+def bench_background():
+    report('putpixel background', 1, timeit.timeit(make_background_putpixel, number=1))
+    report('vectorized background', 10, timeit.timeit(yat_image.make_background, number=10))
+    report('background template copy', 100, timeit.timeit(yat_image.BACKGROUND.copy, number=100))
+
+def split_yat_findall(yat):
+    # the old implementation of yat_utils.split_yat, kept as a baseline
+    return regex.findall(r'\X', yat, regex.U)
+
+def bench_split(n=20000, passes=3):
+    # yat_stats splits every yat of the range several times (lengths, leaderboards, charts...)
+    rnd = random.Random(0)
+    emojis = list(catalog)
+    yats = [''.join(rnd.choice(emojis) for _ in range(rnd.randint(1, 5))) for _ in range(n)]
+    def run(split):
+        for _ in range(passes):
+            for y in yats:
+                split(y)
+    report('findall split ({} yats x {})'.format(n, passes), 1, timeit.timeit(lambda: run(split_yat_findall), number=1))
+    yat_utils.split_yat.cache_clear()
+    report('memoized split, cold ({} yats x {})'.format(n, passes), 1, timeit.timeit(lambda: run(yat_utils.split_yat), number=1))
+    report('memoized split, warm ({} yats x {})'.format(n, passes), 1, timeit.timeit(lambda: run(yat_utils.split_yat), number=1))
+    report('batch split ({} yats)'.format(n), 10, timeit.timeit(lambda: yat_utils.split_many(yats), number=10))
+
+BENCHMARKS = {
+    'background': bench_background,
+    'split': bench_split,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or BENCHMARKS.keys()
+    for name in names:
+        BENCHMARKS[name]()
@@ -2,13 +2,21 @@ from discord.ext.commands import Bot, guild_only
 from discord.ext.commands.errors import MissingRequiredArgument, BadArgument, UserInputError, MissingPermissions, CommandNotFound, CommandInvokeError
 from discord import File, Game, TextChannel, Member, Intents
 from datetime import datetime
+from io import BytesIO
+import asyncio
 
-from yat_image import parse_string, check_seq, make_img
-from yat_pattern import get_yats_from_pattern, scan, PatternException
-from yat_api import paste
+from yat_image import parse_string, check_seq, normalize_seq, strip_infos_from
+from yat_pool import RenderPool, RenderQueueBusy
+from yat_render import warm_worker, render_base, render_finish
+from yat_pattern import compile_pattern, check_count, format_results, PatternException
+from yat_api import paste, YatAPI, infos_cache
 from yat_scanner import YatScanner
 from yat_feeder import YatFeeder
 from yat_opensea import OpenseaFeeder
+from yat_cache import LRUCache
+from yat_catalog import catalog
+from yat_jobs import ScanScheduler
+from yat_charts import ChartService, CHARTS, month_range
 
 import config
 import logging
@@ -22,9 +30,12 @@ else:
 class YatBot(Bot):
     feed_started = False
     os_feed_started = False
+    scan_jobs_started = False
     async def on_ready(self):
         activity = Game("{}view".format(config.PREFIX), start=datetime.now())
         await self.change_presence(activity=activity)
+        render_pool.warm()
+        catalog.start()
 
         if config.START_SCANNER:
             self.scanner = YatScanner(self)
@@ -37,6 +48,10 @@ class YatBot(Bot):
             self.os_feeder = OpenseaFeeder(discord=self)
             self.os_feeder.start()
             self.os_feed_started = True
+        if not self.scan_jobs_started:
+            # resumes the scans that were interrupted by a restart
+            self.scan_jobs.start()
+            self.scan_jobs_started = True
         logging.info('bot is ready')
 
     async def on_command_error(self, ctx, error):
@@ -46,6 +61,39 @@ class YatBot(Bot):
 
 bot = YatBot(command_prefix=config.PREFIX)
 
+# final PNGs of +yatview, keyed by (normalized yat, info strip data)
+render_cache = LRUCache('render cache',
+    max_size=getattr(config, 'RENDER_CACHE_MAX_BYTES', 64 * 1024 * 1024),
+    ttl=getattr(config, 'RENDER_CACHE_TTL', 600))
+render_pool = RenderPool(
+    workers=getattr(config, 'RENDER_WORKERS', 2),
+    max_pending=getattr(config, 'RENDER_MAX_PENDING', 8),
+    timeout=getattr(config, 'RENDER_TIMEOUT', 30),
+    processes=getattr(config, 'RENDER_USE_PROCESSES', True),
+    initializer=warm_worker)
+# short-lived snapshot of the info strip data so popular yats get the same cache key for a while
+info_snapshots = LRUCache('info snapshots', max_size=10000, ttl=getattr(config, 'INFO_SNAPSHOT_TTL', 60), sizeof=lambda v: 1)
+INFO_TIMEOUT = getattr(config, 'INFO_TIMEOUT', 5)
+chart_service = ChartService(
+    max_size=getattr(config, 'CHART_CACHE_MAX_BYTES', 32 * 1024 * 1024),
+    workers=getattr(config, 'CHART_WORKERS', 1),
+    timeout=getattr(config, 'CHART_TIMEOUT', 60))
+yat_api = YatAPI()
+
+async def get_strip_infos(emoji_id):
+    strip_infos = info_snapshots.get(emoji_id)
+    if strip_infos is not None:
+        return strip_infos
+    try:
+        infos = await asyncio.wait_for(yat_api.get_infos(emoji_id), INFO_TIMEOUT)
+    except Exception:
+        logging.warning("couldn't get infos for the info strip of {}".format(emoji_id))
+        infos = None
+    strip_infos = strip_infos_from(infos)
+    if infos:
+        info_snapshots.set(emoji_id, strip_infos)
+    return strip_infos
+
 @bot.command()
 async def invite(ctx):
     await ctx.reply("Invite me on your server by clicking this link: {}".format(
@@ -62,13 +110,35 @@ async def view(ctx, *, arg):
     if not res:
         await ctx.reply(msg)
         return
-    img = make_img(emo_seq)
-    await ctx.reply(file=File(img, filename="beautifulyat.png"))
+    txt = normalize_seq(emo_seq)
+    # peeks: on a miss, get_strip_infos and get_or_create look the same keys up again and count the miss once
+    strip_infos = info_snapshots.peek(txt)
+    if strip_infos is not None:
+        img = render_cache.peek((txt, strip_infos))
+        if img is not None:
+            await ctx.reply(file=File(BytesIO(img), filename="beautifulyat.png"))
+            return
+
+    # render the emojis while we're waiting for a.y.at
+    base_task = asyncio.ensure_future(render_cache.coalesce(('base', txt), lambda: render_pool.run(render_base, emo_seq)))
+    # don't complain about an unretrieved exception if the final image is already cached
+    base_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    if strip_infos is None:
+        strip_infos = await get_strip_infos(txt)
+
+    async def render():
+        return await render_pool.run(render_finish, await base_task, strip_infos)
+    img = await render_cache.get_or_create((txt, strip_infos), render)
+    await ctx.reply(file=File(BytesIO(img), filename="beautifulyat.png"))
 
 @view.error
 async def view_error(ctx, error):
     if isinstance(error, MissingRequiredArgument):
         await ctx.reply("You didn't provide a Yat to display")
+    elif isinstance(error, CommandInvokeError) and isinstance(error.original, RenderQueueBusy):
+        await ctx.reply(str(error.original))
+    elif isinstance(error, CommandInvokeError) and isinstance(error.original, asyncio.TimeoutError):
+        await ctx.reply("Sorry, your image took too long to render. Please try again later")
     else:
         logging.exception("Error while creating yat image", error)
         await ctx.reply("Sorry there was an error....")
@@ -80,16 +150,44 @@ async def pattern(ctx, *, pattern):
     if ctx.author.id not in config.PATTERN_COMMAND_AUTHORIZED:
         await ctx.reply("Sorry you don't have the permission to use this command. Send a DM to sm4sher#0967 if you're interested!")
         return
-    yats = get_yats_from_pattern(pattern)
-    # todo: implement rate limit (5k scans per user per week?) and confirmation dialog
-    await ctx.reply("Your pattern matched {} yats. You have XXX scans remaining. React to confirm (TODO)".format(len(yats)))
-    res = await scan(yats)
-    if len(res) > 500:
-        link = paste(res)
-        msg = "Your pattern search is done! Results were too long for discord, you can view them here {}".format(link)
+    compiled = compile_pattern(pattern)
+    count = compiled.count()
+    check_count(count)
+    # todo: confirmation dialog
+    job_id = bot.scan_jobs.submit(ctx.author.id, ctx.channel.id, None, pattern, compiled)
+    reply = await ctx.reply("Your pattern matched {} yats. You have {} scans remaining this week. Your scan is queued, I'll update this message as it goes".format(
+        count, bot.scan_jobs.scans_remaining(ctx.author.id)))
+    bot.scan_jobs.set_message(job_id, reply.id)
+
+async def get_job_message(job):
+    channel = bot.get_channel(job['channel_id']) or await bot.fetch_channel(job['channel_id'])
+    if job['message_id'] is None:
+        return channel, None
+    return channel, channel.get_partial_message(job['message_id'])
+
+async def on_scan_progress(job):
+    channel, message = await get_job_message(job)
+    if message is not None:
+        await message.edit(content="Your pattern matched {} yats. {}/{} checked, {} available".format(
+            job['total'], job['checked'], job['total'], len(job['results'])))
+
+async def on_scan_done(job):
+    channel, message = await get_job_message(job)
+    if job['status'] == 'failed':
+        msg = "Sorry, your pattern scan failed. Please try again"
+    else:
+        res = format_results(job['results'])
+        if len(res) > 500:
+            link = await paste(res)
+            msg = "Your pattern search is done! Results were too long for discord, you can view them here {}".format(link)
+        else:
+            msg = res.replace("\t", "  -  ") # discord doesn't like tabs
+    if message is not None:
+        await message.reply(msg)
     else:
-        msg = res.replace("\t", "  -  ") # discord doesn't like tabs
-    await ctx.reply(msg)
+        await channel.send("<@{}> {}".format(job['user_id'], msg))
+
+bot.scan_jobs = ScanScheduler(on_progress=on_scan_progress, on_done=on_scan_done)
 
 @pattern.error
 async def pattern_error(ctx, error):
@@ -114,11 +212,49 @@ async def scanstatus(ctx):
         msg += "You aren't subscribed to the notifications. Send a DM to sm4sher#0967 if you're interested!"
     await ctx.reply(msg.format('{}s ago'.format((datetime.now()-bot.scanner.last_scan).seconds) if bot.scanner.last_scan else 'never'))
 
+@bot.command(hidden=True)
+async def cachestats(ctx):
+    await ctx.reply('\n'.join(c.format_stats() for c in (render_cache, info_snapshots, infos_cache, chart_service.cache)))
+
+@bot.command()
+async def stats(ctx, month: typing.Optional[str]=None, chart: str='daily'):
+    """ +yatstats [YYYY-MM] [daily/hourly/weekly/lengths/rs] - Charts of Yat purchases """
+    logging.info('stats cmd in {} by {}'.format(ctx.guild if ctx.guild else 'DM', ctx.author))
+    if month in CHARTS:
+        month, chart = None, month
+    if chart not in CHARTS:
+        await ctx.reply("Unknown chart, available charts are: {}".format(', '.join(CHARTS)))
+        return
+    try:
+        start, end = month_range(month or datetime.utcnow().strftime('%Y-%m'))
+    except ValueError:
+        await ctx.reply("Please give the month as YYYY-MM, for example 2021-06")
+        return
+    img = await chart_service.get_chart(bot.feeder.db, chart, start, end)
+    if img is None:
+        await ctx.reply("No Yat purchases recorded in {:%B %Y}".format(start))
+        return
+    await ctx.reply("{}, {:%B %Y}".format(CHARTS[chart][0], start), file=File(BytesIO(img), filename="yat_stats.png"))
+
+@stats.error
+async def stats_error(ctx, error):
+    if isinstance(error, CommandInvokeError) and isinstance(error.original, RenderQueueBusy):
+        await ctx.reply(str(error.original))
+    elif isinstance(error, CommandInvokeError) and isinstance(error.original, asyncio.TimeoutError):
+        await ctx.reply("Sorry, the chart took too long to render. Please try again later")
+    else:
+        logging.exception("Error while creating stats chart", error)
+        await ctx.reply("Sorry there was an error....")
+
+@bot.command(hidden=True)
+async def feedstats(ctx):
+    await ctx.reply(bot.feeder.poller.format_stats() + '\n' + bot.feeder.dispatcher.format_stats())
+
 @bot.command()
 async def feed(ctx, count: typing.Optional[int]=10):
     """ Print the 10 most recent Yat purchases """
     logging.info('feed cmd in {} by {}'.format(ctx.guild if ctx.guild else 'DM', ctx.author))
-    recent = bot.feeder.get_recent_yats(limit=min(count, 100))
+    recent = await bot.feeder.get_recent_yats(limit=min(count, 100))
     if not recent:
         await ctx.reply('Sorry there was an error, try again later')
         return
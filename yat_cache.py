@@ -0,0 +1,215 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from yat_utils import strip_selectors
+
+class LRUCache:
+    """ LRU cache with TTL expiry, bounded by the total size of its values
+        (sizeof(value), len by default) """
+
+    def __init__(self, name, max_size, ttl, sizeof=len):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.entries = OrderedDict() # key -> (expiry, size, value)
+        # the sync api functions can use caches from executor threads
+        self.lock = threading.RLock()
+        self.size = 0
+        self.in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None, count_miss=True):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self.pop(key)
+                entry = None
+            if entry is None:
+                if count_miss:
+                    self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def peek(self, key, default=None):
+        """ get for a fast path that falls back to get or get_or_create on the same key: a miss isn't counted,
+            the lookup that follows counts it """
+        return self.get(key, default, count_miss=False)
+
+    def set(self, key, value, ttl=None):
+        size = self.sizeof(value)
+        if size > self.max_size:
+            return
+        with self.lock:
+            self.pop(key)
+            self.entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), size, value)
+            self.size += size
+            while self.size > self.max_size:
+                self.pop(next(iter(self.entries)))
+                self.evictions += 1
+
+    def pop(self, key):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.size -= entry[1]
+            return entry
+
+    async def get_or_create(self, key, factory):
+        """ return the cached value for key, or await factory() to create it.
+            concurrent calls for the same key share a single call to factory """
+        value = self.get(key)
+        if value is not None:
+            return value
+        return await self.coalesce(key, factory, store=True)
+
+    async def coalesce(self, key, factory, store=False):
+        """ await factory(), sharing the result with concurrent calls for the same key.
+            factory runs in its own task: a caller that is cancelled (wait_for timeout...) only stops waiting,
+            the other callers still get the result """
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = self.in_flight[key] = asyncio.ensure_future(self.create(key, factory, store))
+            # mark the exception as retrieved so asyncio doesn't complain when every caller stopped waiting
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return await asyncio.shield(task)
+
+    async def create(self, key, factory, store):
+        try:
+            value = await factory()
+            if store and value is not None:
+                self.set(key, value)
+            return value
+        finally:
+            del self.in_flight[key]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'name': self.name,
+            'entries': len(self.entries),
+            'size': self.size,
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(100 * self.hits / lookups, 1) if lookups else 0,
+            'evictions': self.evictions,
+            'coalesced': self.coalesced,
+        }
+
+    def format_stats(self):
+        return "{name}: {entries} entries ({size}/{max_size}), {hits} hits, {misses} misses ({hit_rate}% hit rate), {evictions} evictions, {coalesced} coalesced".format(**self.stats())
+
+class TimeWindowSet:
+    """ set of the keys added during the last window seconds, older keys are evicted as new ones come in
+        so its size only depends on the number of keys per window """
+
+    def __init__(self, window):
+        self.window = window
+        self.items = OrderedDict() # key -> time it was added, oldest first
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def add(self, key, t=None):
+        """ t defaults to now, keys must be added in chronological order """
+        self.items.pop(key, None)
+        self.items[key] = time.time() if t is None else t
+        self.expire()
+
+    def update(self, keys, t=None):
+        for key in keys:
+            self.add(key, t)
+
+    def expire(self, now=None):
+        limit = (time.time() if now is None else now) - self.window
+        items = self.items
+        while items:
+            key = next(iter(items))
+            if items[key] >= limit:
+                break
+            del items[key]
+
+class InfosCache:
+    """ results of /emoji_id/search keyed by normalized emoji_id, taken yats are kept longer than available ones.
+        optionally persisted in sqlite so they survive restarts """
+    TTLS = {'Taken': 3600, 'Available': 60}
+    DEFAULT_TTL = 30
+
+    def __init__(self, max_entries=50000, db_path=None):
+        self.cache = LRUCache('infos cache', max_size=max_entries, ttl=self.DEFAULT_TTL, sizeof=lambda v: 1)
+        self.db = None
+        self.db_lock = threading.Lock()
+        self.db_hits = 0
+        if db_path:
+            self.open_db(db_path)
+
+    def open_db(self, db_path):
+        # it's only a cache, losing the last writes on a crash is fine
+        self.db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=OFF")
+        self.db.execute("CREATE TABLE IF NOT EXISTS infos (emoji_id text PRIMARY KEY, infos text, expiry real)")
+        self.db.execute("DELETE FROM infos WHERE expiry < ?", (time.time(),))
+
+    @staticmethod
+    def normalize(emoji_id):
+        return strip_selectors(emoji_id.replace(' ', ''))
+
+    def ttl(self, infos):
+        return self.TTLS.get(infos.get('availability'), self.DEFAULT_TTL)
+
+    def get(self, emoji_id):
+        key = self.normalize(emoji_id)
+        infos = self.cache.get(key)
+        if infos is None and self.db is not None:
+            with self.db_lock:
+                row = self.db.execute("SELECT infos, expiry FROM infos WHERE emoji_id=?", (key,)).fetchone()
+            if row is not None and row[1] > time.time():
+                self.db_hits += 1
+                infos = json.loads(row[0])
+                self.cache.set(key, infos, ttl=row[1] - time.time())
+        return infos
+
+    def set(self, emoji_id, infos):
+        if not infos:
+            return
+        key = self.normalize(emoji_id)
+        ttl = self.ttl(infos)
+        self.cache.set(key, infos, ttl=ttl)
+        if self.db is not None:
+            with self.db_lock:
+                self.db.execute("INSERT OR REPLACE INTO infos (emoji_id, infos, expiry) VALUES (?, ?, ?)",
+                    (key, json.dumps(infos), time.time() + ttl))
+
+    async def get_or_fetch(self, emoji_id, fetch):
+        """ cached infos for emoji_id, or await fetch(). concurrent lookups of the same yat share one request """
+        infos = self.get(emoji_id)
+        if infos is not None:
+            return infos
+        async def fetch_and_store():
+            # stored by the shared task, even if every caller stopped waiting for it
+            infos = await fetch()
+            self.set(emoji_id, infos)
+            return infos
+        return await self.cache.coalesce(self.normalize(emoji_id), fetch_and_store)
+
+    def format_stats(self):
+        return self.cache.format_stats() + ", {} from sqlite".format(self.db_hits)
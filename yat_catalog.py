@@ -0,0 +1,107 @@
+import asyncio
+import json
+import logging
+import os
+
+from yat_api import get_emoji_list, YatAPI
+from yat_utils import strip_selectors
+
+class EmojiCatalog:
+    """ the list of emojis supported by yat, loaded from a snapshot on disk and refreshed in the background """
+    SNAPSHOT_PATH = 'emoji_catalog.json'
+    REFRESH_INTERVAL = 3600
+
+    def __init__(self, path=SNAPSHOT_PATH):
+        self.path = path
+        self.emojis = []
+        # emoji without its presentation selectors -> the form that is in the catalog
+        self.index = {}
+        self.task = None
+        self.yat_api = None
+        self.load()
+
+    def __contains__(self, emo):
+        return self.index.get(strip_selectors(emo)) == emo
+
+    def __iter__(self):
+        return iter(self.emojis)
+
+    def __len__(self):
+        return len(self.emojis)
+
+    def canonical(self, emo):
+        """ the form of emo that is in the catalog, or None.
+            users might type emojis with or without the variation selectors (FE0F/FE0E) """
+        return self.index.get(strip_selectors(emo))
+
+    def canonical_seq(self, seq):
+        """ canonical form of every emoji of seq, or None if one of them isn't supported """
+        index = self.index
+        res = []
+        for emo in seq:
+            c = index.get(strip_selectors(emo))
+            if c is None:
+                return None
+            res.append(c)
+        return res
+
+    def set_emojis(self, emojis):
+        self.emojis = list(emojis)
+        self.index = {strip_selectors(e): e for e in self.emojis}
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                self.set_emojis(json.load(f))
+            return
+        except FileNotFoundError:
+            logging.info("No emoji catalog snapshot, fetching it from the api")
+        except ValueError:
+            logging.warning("Emoji catalog snapshot is corrupted, fetching it from the api")
+        # only happens the very first time, the background refresh keeps the snapshot up to date after that
+        try:
+            self.update(get_emoji_list())
+        except Exception:
+            # the api is down or there is no network, don't keep the bot from starting: the catalog stays
+            # empty until start() gets it in the background
+            logging.exception("Couldn't fetch the emoji catalog, starting with an empty one:")
+
+    def update(self, emojis):
+        if not emojis:
+            return False
+        if emojis == self.emojis:
+            return False
+        logging.info("Emoji catalog updated: {} emojis".format(len(emojis)))
+        self.set_emojis(emojis)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.emojis, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        return True
+
+    async def refresh(self):
+        if self.yat_api is None:
+            self.yat_api = YatAPI()
+        return self.update(await self.yat_api.get_emoji_list())
+
+    def start(self):
+        if self.task is not None:
+            return
+        loop = asyncio.get_event_loop()
+        self.task = loop.create_task(self.run())
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+                await asyncio.sleep(self.REFRESH_INTERVAL)
+            except asyncio.CancelledError:
+                if self.yat_api is not None:
+                    await self.yat_api.close()
+                self.task = None
+                break
+            except Exception:
+                logging.exception("Error while refreshing the emoji catalog:")
+                await asyncio.sleep(60)
+
+catalog = EmojiCatalog()
@@ -0,0 +1,66 @@
+import calendar
+import logging
+import sqlite3
+from datetime import date
+from io import BytesIO
+
+# yat_stats selects the headless Agg backend before it imports pyplot
+import yat_stats
+import matplotlib.pyplot as plt
+from yat_cache import LRUCache
+from yat_pool import RenderPool
+
+# chart name: (description, function returning the figure for a dataset and a date range)
+CHARTS = {
+    'daily': ("Yats bought per day", lambda ds, start, end: yat_stats.time_chart_figure(ds, start, end, 'day')),
+    'hourly': ("Yats bought per hour", lambda ds, start, end: yat_stats.time_chart_figure(ds, start, end, 'hour')),
+    'weekly': ("Yats bought per week", lambda ds, start, end: yat_stats.time_chart_figure(ds, start, end, 'week')),
+    'lengths': ("Yats bought per day by length", lambda ds, start, end: yat_stats.time_chart_figure(ds, start, end, 'day', by_length=True)),
+    'rs': ("RS of the yats bought", lambda ds, start, end: yat_stats.rs_chart_figure(ds)),
+}
+
+def render_chart(chart, start, end, db_path):
+    """ PNG of a chart, runs in a worker process """
+    db = sqlite3.connect(db_path)
+    try:
+        ds = yat_stats.load_yats(start, end, db)
+    finally:
+        db.close()
+    fig = CHARTS[chart][1](ds, start, end)
+    buf = BytesIO()
+    fig.savefig(buf, format='png')
+    plt.close(fig)
+    return buf.getvalue()
+
+def watermark(db, start, end):
+    """ (number of purchases, last purchase id) in the date range, from the ts index """
+    return db.execute("SELECT COUNT(*), MAX(id) FROM purch_yats WHERE ts >= ? AND ts < ?",
+        yat_stats.day_range(start, end)).fetchone()
+
+def month_range(month):
+    """ first and last day of a month given as YYYY-MM """
+    year, month = (int(x) for x in month.split('-'))
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+class ChartService:
+    """ renders yat_stats charts in a worker process. PNGs are cached by chart, date range and data watermark,
+        so a chart is only rendered again when purchases were added to its date range """
+
+    def __init__(self, max_size=32 * 1024 * 1024, ttl=24 * 3600, workers=1, max_pending=4, timeout=60):
+        self.cache = LRUCache('chart cache', max_size=max_size, ttl=ttl)
+        self.pool = RenderPool(workers=workers, max_pending=max_pending, timeout=timeout)
+
+    async def get_chart(self, db, chart, start, end):
+        """ PNG of the chart between the start and end dates, or None if there were no purchases.
+            db is the bot's AsyncDB (already migrated), the workers open their own connection to its file """
+        mark = await db.read(watermark, start, end)
+        if not mark[0]:
+            return None
+        key = (chart, start, end, mark)
+        async def render():
+            logging.info("rendering {} chart from {} to {}".format(chart, start, end))
+            return await self.pool.run(render_chart, chart, start, end, db.path)
+        return await self.cache.get_or_create(key, render)
+
+    def close(self):
+        self.pool.close()
@@ -0,0 +1,310 @@
+import asyncio
+import logging
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+
+from yat_utils import split_many
+
+# bumped each time migrate() changes the schema of feed.db
+SCHEMA_VERSION = 4
+
+def migrate(db):
+    """ bring the purch_yats schema of feed.db up to date """
+    version = db.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    with db:
+        # one transaction for the whole migration (the sqlite3 module doesn't open one for DDL statements)
+        db.execute("BEGIN")
+        db.execute("CREATE TABLE IF NOT EXISTS purch_yats (date text, yat text, rs int)")
+        if version < 1:
+            migrate_v1(db)
+        if version < 2:
+            migrate_v2(db)
+        if version < 3:
+            migrate_v3(db)
+        if version < 4:
+            migrate_v4(db)
+        db.execute("PRAGMA user_version = {}".format(SCHEMA_VERSION))
+
+def migrate_v1(db):
+    # v1: explicit id (rowids of implicit tables can change on VACUUM), epoch and length columns,
+    # and the emojis of each yat in their own table so leaderboards are sql aggregations
+    logging.info("Migrating purch_yats to schema v1")
+    db.execute("""CREATE TABLE purch_yats_v1 (id INTEGER PRIMARY KEY, date text, yat text, rs int, ts int, length int)""")
+    db.execute("""INSERT INTO purch_yats_v1 (id, date, yat, rs, ts)
+        SELECT rowid, date, yat, rs, CAST(strftime('%s', date) AS INTEGER) FROM purch_yats""")
+    db.execute("DROP TABLE purch_yats")
+    db.execute("ALTER TABLE purch_yats_v1 RENAME TO purch_yats")
+    db.execute("CREATE TABLE yat_emojis (yat_rowid int, position int, emoji text)")
+    rows = db.execute("SELECT id, yat FROM purch_yats").fetchall()
+    splits = split_many(r[1] for r in rows)
+    db.executemany("UPDATE purch_yats SET length=? WHERE id=?", ((len(s), r[0]) for r, s in zip(rows, splits)))
+    db.executemany("INSERT INTO yat_emojis (yat_rowid, position, emoji) VALUES (?, ?, ?)",
+        ((r[0], i, e) for r, s in zip(rows, splits) for i, e in enumerate(s)))
+    db.execute("CREATE INDEX purch_yats_ts ON purch_yats (ts)")
+    db.execute("CREATE INDEX yat_emojis_yat ON yat_emojis (yat_rowid)")
+    db.execute("CREATE INDEX yat_emojis_emoji ON yat_emojis (emoji)")
+
+def migrate_v2(db):
+    # v2: daily rollups, so monthly stats don't need to go through every purchase
+    logging.info("Migrating feed.db to schema v2 (daily rollups)")
+    db.execute("""CREATE TABLE daily_stats (day text, length int, count int, rs_sum int, rs_80 int, rs_90 int,
+        PRIMARY KEY (day, length))""")
+    # first is the position of the first occurrence (id * 8 + position), to order ties like the python leaderboards
+    db.execute("CREATE TABLE daily_emojis (day text, emoji text, count int, first int, PRIMARY KEY (day, emoji))")
+    update_rollups(db, db.execute("SELECT MIN(id), MAX(id) FROM purch_yats").fetchone())
+
+def migrate_v3(db):
+    # v3: a yat is only stored once, restarts and overlapping polls used to insert duplicates
+    duplicates = db.execute("DELETE FROM purch_yats WHERE id NOT IN (SELECT MIN(id) FROM purch_yats GROUP BY yat)").rowcount
+    logging.info("Migrating feed.db to schema v3 (unique yats), removed {} duplicates".format(duplicates))
+    if duplicates:
+        db.execute("DELETE FROM yat_emojis WHERE yat_rowid NOT IN (SELECT id FROM purch_yats)")
+        db.execute("DELETE FROM daily_stats")
+        db.execute("DELETE FROM daily_emojis")
+        update_rollups(db, db.execute("SELECT MIN(id), MAX(id) FROM purch_yats").fetchone())
+    db.execute("CREATE UNIQUE INDEX purch_yats_yat ON purch_yats (yat)")
+
+def migrate_v4(db):
+    # v4: feed subscriptions in one table, one row per channel and feed type, with the guild to know its shard
+    logging.info("Migrating feed.db to schema v4 (feed subscriptions)")
+    db.execute("""CREATE TABLE feed_subscriptions (channel_id int, feed_type int, guild_id int, creator_id int, created_date text,
+        enabled int, PRIMARY KEY (channel_id, feed_type))""")
+    db.execute("CREATE INDEX feed_subscriptions_guild ON feed_subscriptions (enabled, feed_type, guild_id)")
+    for table, feed_type in (('livefeeds', 0), ('osfeeds', 1)):
+        if db.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone() is None:
+            continue
+        # registering a channel again used to add a row, the last one is the current state
+        db.execute("""INSERT OR IGNORE INTO feed_subscriptions (channel_id, feed_type, creator_id, created_date, enabled)
+            SELECT CAST(channel_id AS INTEGER), ?, CAST(creator_id AS INTEGER), created_date, enabled FROM {0}
+            WHERE rowid IN (SELECT MAX(rowid) FROM {0} GROUP BY channel_id)""".format(table), (feed_type,))
+
+def update_rollups(db, id_range):
+    """ add the purchases with ids in id_range (inclusive) to the daily rollups """
+    first_id, last_id = id_range
+    if first_id is None:
+        return
+    db.execute("""INSERT INTO daily_stats (day, length, count, rs_sum, rs_80, rs_90)
+        SELECT date(ts, 'unixepoch') AS d, length, COUNT(*), COALESCE(SUM(rs), 0), COALESCE(SUM(rs >= 80), 0), COALESCE(SUM(rs >= 90), 0)
+        FROM purch_yats WHERE id BETWEEN ? AND ? GROUP BY d, length
+        ON CONFLICT (day, length) DO UPDATE SET count = count + excluded.count, rs_sum = rs_sum + excluded.rs_sum,
+            rs_80 = rs_80 + excluded.rs_80, rs_90 = rs_90 + excluded.rs_90""", (first_id, last_id))
+    db.execute("""INSERT INTO daily_emojis (day, emoji, count, first)
+        SELECT date(p.ts, 'unixepoch') AS d, e.emoji, COUNT(*), MIN(p.id * 8 + e.position)
+        FROM purch_yats p JOIN yat_emojis e ON e.yat_rowid = p.id WHERE p.id BETWEEN ? AND ? GROUP BY d, e.emoji
+        ON CONFLICT (day, emoji) DO UPDATE SET count = count + excluded.count, first = MIN(first, excluded.first)""",
+        (first_id, last_id))
+
+def run_statement(db, q, args=(), many=False):
+    cur = db.executemany(q, args) if many else db.execute(q, args)
+    return cur.lastrowid if not many else cur.rowcount
+
+def fetch_statement(db, q, args=()):
+    return db.execute(q, args).fetchall()
+
+class AsyncDB:
+    """ sqlite in WAL mode for the bot. writes are queued to one writer thread that commits whatever is queued
+        in a single transaction, reads run in a small thread pool with a connection per thread """
+    BATCH_SIZE = 200
+
+    def __init__(self, path, readers=2):
+        self.path = path
+        self.local = threading.local()
+        self.queue = queue.Queue()
+        self.readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix='db-reader')
+        db = self.connect()
+        migrate(db)
+        db.close()
+        self.thread = threading.Thread(target=self.writer, name='db-writer', daemon=True)
+        self.thread.start()
+
+    def connect(self):
+        db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        # in WAL mode NORMAL only syncs on checkpoints, a crash can lose the last commits but not corrupt the db
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA busy_timeout=5000")
+        return db
+
+    def write(self, fn, *args):
+        """ queue fn(db, *args) to the writer thread, returns a concurrent.futures.Future of its result.
+            nothing is committed until fn returns, if it raises its changes are rolled back """
+        fut = Future()
+        fut.add_done_callback(self.log_error)
+        self.queue.put((fn, args, fut))
+        return fut
+
+    def execute(self, q, args=(), many=False):
+        return self.write(run_statement, q, args, many)
+
+    @staticmethod
+    def log_error(fut):
+        if not fut.cancelled() and fut.exception() is not None:
+            logging.error("Error in a database write:", exc_info=fut.exception())
+
+    def writer(self):
+        db = self.connect()
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    # write what we have, then stop
+                    self.queue.put(None)
+                    break
+                batch.append(item)
+            self.write_batch(db, batch)
+        db.close()
+
+    def write_batch(self, db, batch):
+        results = []
+        try:
+            db.execute("BEGIN")
+            for fn, args, fut in batch:
+                # a failing write doesn't take the rest of the batch down with it
+                db.execute("SAVEPOINT item")
+                try:
+                    res = fn(db, *args)
+                except Exception as e:
+                    db.execute("ROLLBACK TO item")
+                    results.append((fut, None, e))
+                else:
+                    results.append((fut, res, None))
+                db.execute("RELEASE item")
+            db.execute("COMMIT")
+        except Exception as e:
+            logging.exception("Database write batch failed:")
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            results = [(fut, None, e) for _, _, fut in batch]
+        for fut, res, exc in results:
+            if exc is None:
+                fut.set_result(res)
+            else:
+                fut.set_exception(exc)
+
+    def reader(self):
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = self.local.db = self.connect()
+        return db
+
+    def call_reader(self, fn, args):
+        return fn(self.reader(), *args)
+
+    async def read(self, fn, *args):
+        """ fn(db, *args) in a reader thread """
+        return await asyncio.get_event_loop().run_in_executor(self.readers, self.call_reader, fn, args)
+
+    async def fetchall(self, q, args=()):
+        return await self.read(fetch_statement, q, args)
+
+    def fetchall_sync(self, q, args=()):
+        """ for startup code, reads don't wait for the writer in WAL mode """
+        return fetch_statement(self.reader(), q, args)
+
+    async def close(self):
+        self.queue.put(None)
+        await asyncio.get_event_loop().run_in_executor(None, self.thread.join)
+        self.readers.shutdown(wait=False)
+
+def to_epoch(d):
+    """ epoch of a datetime, naive datetimes are UTC like the dates stored in purch_yats """
+    if d.tzinfo is None:
+        d = d.replace(tzinfo=timezone.utc)
+    return int(d.timestamp())
+
+def day_range(start, end):
+    """ epochs of the start of the start date and of the end of the end date (UTC) """
+    start = datetime(year=start.year, month=start.month, day=start.day, tzinfo=timezone.utc)
+    end = datetime(year=end.year, month=end.month, day=end.day, tzinfo=timezone.utc) + timedelta(days=1)
+    return int(start.timestamp()), int(end.timestamp())
+
+def insert_purchases(db, purchases):
+    """ insert (date, yat, rs) rows, with their derived columns, and add them to the rollups. doesn't commit.
+        yats that are already stored are skipped, so it's safe to replay. returns the rows that were inserted """
+    purchases = list(purchases)
+    ids = []
+    inserted = []
+    for purchase, split in zip(purchases, split_many(p[1] for p in purchases)):
+        date, yat, rs = purchase
+        cur = db.execute("INSERT OR IGNORE INTO purch_yats (date, yat, rs, ts, length) VALUES (?, ?, ?, ?, ?)",
+            (date, yat, rs, to_epoch(datetime.fromisoformat(date)), len(split)))
+        if not cur.rowcount:
+            continue
+        db.executemany("INSERT INTO yat_emojis (yat_rowid, position, emoji) VALUES (?, ?, ?)",
+            ((cur.lastrowid, i, e) for i, e in enumerate(split)))
+        ids.append(cur.lastrowid)
+        inserted.append(purchase)
+    if ids:
+        update_rollups(db, (min(ids), max(ids)))
+    return inserted
+
+def count_by_length(db, start, end):
+    """ {length: number of yats} bought between the start and end epochs (end excluded) """
+    cur = db.execute("SELECT length, COUNT(*) FROM purch_yats WHERE ts >= ? AND ts < ? GROUP BY length", (start, end))
+    return dict(cur.fetchall())
+
+def top_emojis(db, start, end, n=10):
+    """ the n emojis used the most in yats bought between the start and end epochs, with their count.
+        ties are in order of first appearance """
+    cur = db.execute("""SELECT e.emoji, COUNT(*) AS cnt FROM purch_yats p JOIN yat_emojis e ON e.yat_rowid = p.id
+        WHERE p.ts >= ? AND p.ts < ? GROUP BY e.emoji ORDER BY cnt DESC, MIN(p.id * 8 + e.position) LIMIT ?""", (start, end, n))
+    return cur.fetchall()
+
+def period_stats(db, start_day, end_day):
+    """ totals of the daily rollups between two days (iso dates, included) """
+    cur = db.execute("""SELECT length, SUM(count), SUM(rs_sum), SUM(rs_80), SUM(rs_90) FROM daily_stats
+        WHERE day BETWEEN ? AND ? GROUP BY length""", (start_day, end_day))
+    by_length = {}
+    total = rs_sum = rs_80 = rs_90 = 0
+    for length, count, length_rs_sum, length_rs_80, length_rs_90 in cur.fetchall():
+        by_length[length] = count
+        total += count
+        rs_sum += length_rs_sum
+        rs_80 += length_rs_80
+        rs_90 += length_rs_90
+    return {'total': total, 'by_length': by_length, 'rs_sum': rs_sum, 'rs_80': rs_80, 'rs_90': rs_90}
+
+def period_top_emojis(db, start_day, end_day, n=10):
+    """ top_emojis from the daily rollups """
+    cur = db.execute("""SELECT emoji, SUM(count) AS cnt FROM daily_emojis WHERE day BETWEEN ? AND ?
+        GROUP BY emoji ORDER BY cnt DESC, MIN(first) LIMIT ?""", (start_day, end_day, n))
+    return cur.fetchall()
+
+def top_rs(db, start, end, n=10):
+    """ the n yats with the best RS bought between the start and end epochs """
+    cur = db.execute("SELECT yat, rs FROM purch_yats WHERE ts >= ? AND ts < ? ORDER BY rs DESC, id LIMIT ?", (start, end, n))
+    return cur.fetchall()
+
+def month_announcement(db, year, month):
+    """ text of the monthly stats announcement, from the daily rollups """
+    start = date(year, month, 1)
+    end = (start + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+    stats = period_stats(db, start.isoformat(), end.isoformat())
+    if not stats['total']:
+        return None
+    lines = [
+        '**{} Stats**'.format(start.strftime('%B %Y')),
+        '',
+        'Between {} and {}, **{}** yats have been created!'.format(start, end, stats['total']),
+        '**{}** were 3 emojis, **{}** were 4 emojis and **{}** were 5 emojis.'.format(*(stats['by_length'].get(n, 0) for n in (3, 4, 5))),
+        'Average Rhythm Score was **{}**, with **{}** yats above RS90'.format(round(stats['rs_sum'] / stats['total'], 2), stats['rs_90']),
+        '',
+        '**==== Emojis Leaderboard ====**',
+        '',
+    ]
+    lines += ['{}: {} ({})'.format(i+1, emo, cnt) for i, (emo, cnt) in enumerate(period_top_emojis(db, start.isoformat(), end.isoformat()))]
+    lines += ['', '**==== RS Leaderboard ====**', '']
+    lines += ['{}: {} (RS{})'.format(i+1, yat, rs) for i, (yat, rs) in enumerate(top_rs(db, *day_range(start, end)))]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+import discord
+
+from yat_http import TokenBucket
+
+MAX_MESSAGE_LENGTH = 2000
+
+def split_message(msg, max_length=MAX_MESSAGE_LENGTH):
+    """ split a message on line breaks so each part fits in a discord message """
+    parts = []
+    current = ''
+    for line in msg.split('\n'):
+        while len(line) > max_length:
+            if current:
+                parts.append(current)
+                current = ''
+            parts.append(line[:max_length])
+            line = line[max_length:]
+        if current and len(current) + 1 + len(line) > max_length:
+            parts.append(current)
+            current = line
+        else:
+            current = current + '\n' + line if current else line
+    if current:
+        parts.append(current)
+    return parts
+
+class ChannelQueue:
+    """ messages waiting to be sent to one channel, and its metrics """
+
+    def __init__(self, channel, rate):
+        self.channel = channel
+        self.pending = deque() # (message, time it was queued)
+        self.bucket = TokenBucket(*rate)
+        self.task = None
+        self.failures = 0
+        self.sent = 0
+        self.merged = 0
+        self.errors = 0
+        self.dropped = 0
+        self.latency = None # moving average, from queued to sent
+        self.max_backlog = 0
+
+    def next_message(self):
+        """ pop the pending messages that fit in one discord message, and when the oldest one was queued """
+        msg, queued = self.pending.popleft()
+        while self.pending and len(msg) + 1 + len(self.pending[0][0]) <= MAX_MESSAGE_LENGTH:
+            msg += '\n' + self.pending.popleft()[0]
+            self.merged += 1
+        return msg, queued
+
+    def record_latency(self, seconds):
+        self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+
+class FanoutDispatcher:
+    """ sends feed messages to many channels. each channel has its own queue and worker, so a slow channel
+        doesn't hold the others back, and all of them share a global send budget under discord's rate limits.
+        a channel that fell behind gets its pending messages merged. channels that were deleted or that we can't send to
+        anymore are disabled, other errors only pause the channel in memory and drop its backlog """
+    # discord allows 50 requests per second per bot, and 5 messages per 5 seconds per channel
+    GLOBAL_RATE = (45, 45)
+    CHANNEL_RATE = (1, 5)
+    MAX_FAILURES = 3
+    RETRY_DELAY = 5
+    MAX_RETRY_DELAY = 300
+
+    def __init__(self, on_disable=None):
+        # on_disable(channel) is called when a channel was deleted or we lost the permission to send to it
+        self.on_disable = on_disable
+        self.queues = {}
+        self.bucket = TokenBucket(*self.GLOBAL_RATE)
+
+    def broadcast(self, channels, msg):
+        parts = split_message(msg)
+        now = time.monotonic()
+        for chan in channels:
+            queue = self.queues.get(chan.id)
+            if queue is None:
+                queue = self.queues[chan.id] = ChannelQueue(chan, self.CHANNEL_RATE)
+            queue.pending.extend((part, now) for part in parts)
+            queue.max_backlog = max(queue.max_backlog, len(queue.pending))
+            if queue.task is None:
+                queue.task = asyncio.get_event_loop().create_task(self.run(queue))
+
+    async def run(self, queue):
+        try:
+            while queue.pending:
+                await queue.bucket.acquire()
+                await self.bucket.acquire()
+                msg, queued = queue.next_message()
+                try:
+                    await queue.channel.send(msg)
+                except (discord.NotFound, discord.Forbidden) as e:
+                    # deleted channel or missing permissions, it won't get better
+                    logging.info("Disabling feed channel {}: {}".format(queue.channel.id, e))
+                    self.disable(queue)
+                    return
+                except Exception as e:
+                    # 5xx, timeouts, connection errors: discord or the network is having trouble, not the channel
+                    queue.errors += 1
+                    queue.failures += 1
+                    delay = min(self.RETRY_DELAY * 2 ** (queue.failures - 1), self.MAX_RETRY_DELAY)
+                    if queue.failures >= self.MAX_FAILURES:
+                        # the messages would be stale by the time it works again
+                        dropped = len(queue.pending) + 1
+                        queue.dropped += dropped
+                        queue.pending.clear()
+                        logging.warning("Pausing feed channel {} for {}s after {} failures, dropped {} messages: {}".format(
+                            queue.channel.id, delay, queue.failures, dropped, e))
+                    else:
+                        # retry it later, merged with whatever came in meanwhile
+                        queue.pending.appendleft((msg, queued))
+                    await asyncio.sleep(delay)
+                    continue
+                queue.failures = 0
+                queue.sent += 1
+                queue.record_latency(time.monotonic() - queued)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logging.exception("Error in the feed dispatcher of channel {}:".format(queue.channel.id))
+        finally:
+            queue.task = None
+
+    def disable(self, queue):
+        queue.pending.clear()
+        self.queues.pop(queue.channel.id, None)
+        if self.on_disable is not None:
+            self.on_disable(queue.channel)
+
+    def backlog(self):
+        return sum(len(q.pending) for q in self.queues.values())
+
+    def metrics(self):
+        """ per channel id: messages waiting, the most that ever were, sent, merged, dropped, errors and average latency """
+        return {
+            chan_id: {
+                'backlog': len(q.pending),
+                'max_backlog': q.max_backlog,
+                'sent': q.sent,
+                'merged': q.merged,
+                'dropped': q.dropped,
+                'errors': q.errors,
+                'latency': q.latency,
+            }
+            for chan_id, q in self.queues.items()
+        }
+
+    def format_stats(self, n=5):
+        metrics = self.metrics()
+        slowest = sorted(metrics.items(), key=lambda m: m[1]['latency'] or 0, reverse=True)[:n]
+        lines = ["feed dispatcher: {} channels, {} messages waiting".format(len(metrics), self.backlog())]
+        lines += ["{}: latency {:.1f}s, backlog {} (max {}), {} sent, {} merged, {} dropped, {} errors".format(
+            chan_id, m['latency'] or 0, m['backlog'], m['max_backlog'], m['sent'], m['merged'], m['dropped'], m['errors']) for chan_id, m in slowest]
+        return '\n'.join(lines)
+
+    def close(self):
+        for queue in self.queues.values():
+            if queue.task is not None:
+                queue.task.cancel()
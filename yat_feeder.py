@@ -1,104 +1,108 @@
 import logging
-import sqlite3
 import asyncio
 import os
+import time
 from datetime import datetime, timezone, timedelta
 
-import discord
-
+import config
 from yat_api import YatAPI
+from yat_cache import TimeWindowSet
+from yat_dispatch import FanoutDispatcher
+from yat_poller import AdaptivePoller
+from yat_db import AsyncDB, insert_purchases, month_announcement
+from yat_subscriptions import SubscriptionRegistry, LIVEFEED, OPENSEA_FEED
 
 class YatFeeder:
+    # how long purchased yats are remembered to filter the recent purchases, the db ignores older duplicates anyway
+    DEDUP_WINDOW = 4 * 24 * 3600
+    # extra polls in a row when a poll only returned new purchases
+    GAP_RETRIES = 3
+    # purchases are stored with this offset, so a day of purchases ends at 22:00 UTC
+    PURCHASE_OFFSET = timedelta(hours=22)
+
     def __init__(self, bot):
         self.bot = bot
-        self.db = sqlite3.connect('feed.db')
+        # writes are queued to a writer thread, they don't block the event loop
+        self.db = AsyncDB('feed.db')
         self.yat_api = YatAPI()
+        self.dispatcher = FanoutDispatcher(on_disable=self.disable_chan)
+        self.poller = AdaptivePoller(self.yat_api,
+            min_interval=getattr(config, 'FEED_MIN_INTERVAL', 10),
+            max_interval=getattr(config, 'FEED_MAX_INTERVAL', 120))
+        self.task = None
         self.init_db()
         self.load_config()
 
-    def db_exec(self, q, args=(), many=False):
-        cur = self.db.cursor()
-        if many:
-            cur.executemany(q, args)
-        else:
-            cur.execute(q, args)
-        self.db.commit()
-        return cur
-
     def init_db(self):
-        self.db = sqlite3.connect('feed.db')
-        # snwoflake ids should be int? if sqlite supports 64bits int
-        self.db_exec("CREATE TABLE IF NOT EXISTS purch_yats (date text, yat text, rs int)")
-        self.db_exec("CREATE TABLE IF NOT EXISTS livefeeds (created_date text, channel_id text, creator_id text, enabled int)")
-        self.db_exec("CREATE TABLE IF NOT EXISTS osfeeds (created_date text, channel_id text, creator_id text, enabled int)")
-        self.db_exec("CREATE TABLE IF NOT EXISTS announcements (id INTEGER PRIMARY KEY, filename text, sched_date text, sent int)")
+        # load_config reads it right after
+        self.db.execute("CREATE TABLE IF NOT EXISTS announcements (id INTEGER PRIMARY KEY, filename text, sched_date text, sent int)").result()
 
     def load_config(self):
-        cur = self.db_exec("SELECT channel_id FROM livefeeds WHERE enabled=1")
-        lines = cur.fetchall()
-        self.channels = set()
-        for line in lines:
-            chan = self.bot.get_channel(int(line[0]))
-            if chan is None:
-                self.db_exec("UPDATE livefeeds SET enabled=0 WHERE channel_id=?", (line[0],))
-            else:
-                self.channels.add(chan)
-
-        cur = self.db_exec("SELECT channel_id FROM osfeeds WHERE enabled=1")
-        lines = cur.fetchall()
-        self.os_channels = set()
-        for line in lines:
-            chan = self.bot.get_channel(int(line[0]))
-            if chan is None:
-                self.db_exec("UPDATE osfeeds SET enabled=0 WHERE channel_id=?", (line[0],))
-            else:
-                self.os_channels.add(chan)
-
-        cur = self.db_exec("SELECT yat FROM purch_yats WHERE date > ?", ((datetime.now(tz=timezone.utc)-timedelta(days=4)).isoformat(),))
-        self.processed_list = {line[0] for line in cur.fetchall()}
-
-    def update_processed_list(self, yats):
-        self.processed_list |= {y.get('emoji_id') for y in yats}
-        values = [((datetime.now(tz=timezone.utc)-timedelta(hours=22)).isoformat(), y.get('emoji_id'), y.get('rhythm_score')) for y in yats]
-        self.db_exec("INSERT INTO purch_yats (date, yat, rs) VALUES (?, ?, ?)", values, many=True)
+        self.subscriptions = SubscriptionRegistry(self.bot, self.db)
+        self.subscriptions.load()
+
+        # yat -> purchase time, for the last DEDUP_WINDOW seconds
+        self.processed_list = TimeWindowSet(self.DEDUP_WINDOW)
+        lines = self.db.fetchall_sync("SELECT yat, ts FROM purch_yats WHERE ts > ? ORDER BY ts", (int(time.time()) - self.DEDUP_WINDOW,))
+        for yat, ts in lines:
+            self.processed_list.add(yat, ts)
+
+    @property
+    def channels(self):
+        return self.subscriptions.get(LIVEFEED)
+
+    @property
+    def os_channels(self):
+        return self.subscriptions.get(OPENSEA_FEED)
+
+    async def update_processed_list(self, yats):
+        """ store the purchases, returns the ones that weren't already in the db """
+        date = datetime.now(tz=timezone.utc) - self.PURCHASE_OFFSET
+        self.processed_list.update((y.get('emoji_id') for y in yats), date.timestamp())
+        values = [(date.isoformat(), y.get('emoji_id'), y.get('rhythm_score')) for y in yats]
+        inserted = await asyncio.wrap_future(self.db.write(insert_purchases, values))
+        inserted = {p[1] for p in inserted}
+        return [y for y in yats if y.get('emoji_id') in inserted]
 
     def register_chan(self, channel, creator):
-        self.channels.add(channel)
-        self.db_exec("INSERT INTO livefeeds (created_date, channel_id, creator_id, enabled) VALUES (?, ?, ?, 1)",
-            (datetime.now().isoformat(), channel.id, creator.id))
+        self.subscriptions.subscribe(channel, creator, LIVEFEED)
 
     def unregister_chan(self, channel):
-        try:
-            self.channels.remove(channel)
-        except KeyError:
-            return False, "No active livefeed in this channel"
-        self.db_exec("UPDATE livefeeds SET enabled=0 WHERE channel_id=?", (channel.id,))
-        return True, ''
+        return self.subscriptions.unsubscribe(channel, LIVEFEED)
 
     def register_os_chan(self, channel, creator):
-        self.os_channels.add(channel)
-        self.db_exec("INSERT INTO osfeeds (created_date, channel_id, creator_id, enabled) VALUES (?, ?, ?, 1)",
-            (datetime.now().isoformat(), channel.id, creator.id))
+        self.subscriptions.subscribe(channel, creator, OPENSEA_FEED)
 
     def unregister_os_chan(self, channel):
-        try:
-            self.os_channels.remove(channel)
-        except KeyError:
-            return False, "No active livefeed in this channel"
-        self.db_exec("UPDATE osfeeds SET enabled=0 WHERE channel_id=?", (channel.id,))
-        return True, ''
+        return self.subscriptions.unsubscribe(channel, OPENSEA_FEED)
 
     async def send(self, msg, feed_type=0):
-        if feed_type == 0:
-            channels = self.channels
-        elif feed_type == 1:
-            channels = self.os_channels
-        tasks = [chan.send(msg) for chan in channels]
-        # if channel has been deleted it will return discord.NotFound exception. We will disable it at next bot restart
-        await asyncio.gather(*tasks, return_exceptions=True)
+        channels = self.subscriptions.get(feed_type)
+        # queued per channel, channels that were deleted or keep failing are disabled by the dispatcher
+        self.dispatcher.broadcast(channels, msg)
+
+    def disable_chan(self, channel):
+        self.subscriptions.disable(channel)
+
+    async def write_month_stats(self):
+        """ write last month's stats announcement from the rollups, once. sending it is still scheduled by hand """
+        # with the offset, the purchases of the first hours of the 1st still go to the last day of the previous month,
+        # a month is only closed once the offset time is in the next one
+        first_day = (datetime.now(tz=timezone.utc) - self.PURCHASE_OFFSET).replace(day=1)
+        last_month = first_day - timedelta(days=1)
+        path = os.path.join('announcements', '{:%Y%m}_stats.txt'.format(last_month))
+        if os.path.exists(path):
+            return
+        content = await self.db.read(month_announcement, last_month.year, last_month.month)
+        if content is None:
+            return
+        logging.info('Writing stats announcement {}'.format(path))
+        os.makedirs('announcements', exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
 
     async def check_annoucements(self):
-        announcements = self.db_exec("SELECT id, filename FROM announcements WHERE sent=0 AND datetime('now') >= datetime(sched_date)").fetchall()
+        announcements = await self.db.fetchall("SELECT id, filename FROM announcements WHERE sent=0 AND datetime('now') >= datetime(sched_date)")
         for ann in announcements:
             await self.make_annoucement({'id': ann[0], 'filename': ann[1]})
 
@@ -106,41 +110,77 @@ class YatFeeder:
         logging.info('Sending livefeed annoucement id {}'.format(ann['id']))
         with open(os.path.join('announcements', ann['filename']), "r") as f:
             content = f.read()
-        self.db_exec("UPDATE announcements SET sent=1 WHERE id=?", (ann['id'],))
+        await asyncio.wrap_future(self.db.execute("UPDATE announcements SET sent=1 WHERE id=?", (ann['id'],)))
         await self.send(content)
 
     def start(self):
+        if self.task is not None:
+            logging.warning("Couldn't start feeder task: already running")
+            return
         logging.info('Starting feeder task for {} livefeeds'.format(len(self.channels)))
-        self.task_feeder.start()
-
-    @discord.ext.tasks.loop(seconds=30)
-    async def task_feeder(self):
-        await self.check_annoucements()
-        # get list of recently purchased yats
-        recent = await self.yat_api.get_recent_purchases()
-        if recent == False:
+        loop = asyncio.get_event_loop()
+        self.task = loop.create_task(self.run())
+
+    def stop(self):
+        logging.info("Stopping feeder task")
+        self.task.cancel()
+
+    async def run(self):
+        # not a tasks.loop: it schedules the next iteration before running this one, so a new poll interval
+        # would only apply one (possibly max_interval long) iteration late
+        while True:
+            try:
+                await self.check_feed()
+                await asyncio.sleep(self.poller.interval)
+            except asyncio.CancelledError:
+                self.dispatcher.close()
+                await self.db.close()
+                await self.yat_api.close()
+                self.task = None
+                logging.info("Stopped YatFeeder task")
+                break
+            except Exception:
+                logging.exception("Error during YatFeeder operation:")
+                await asyncio.sleep(5)
+
+    async def check_feed(self):
+        # announcements are extras, an error in them mustn't keep the feed from posting purchases
+        try:
+            await self.check_annoucements()
+        except Exception:
+            logging.exception("Error while sending announcements:")
+        try:
+            await self.write_month_stats()
+        except Exception:
+            logging.exception("Error while writing the month stats announcement:")
+        gaps = self.poller.gaps
+        await self.process_recent()
+        # during drops a whole page can be bought between two polls, catch up now rather than at the next iteration
+        retries = 0
+        while self.poller.gaps > gaps and retries < self.GAP_RETRIES:
+            gaps = self.poller.gaps
+            retries += 1
+            await asyncio.sleep(self.poller.min_interval)
+            await self.process_recent()
+
+    async def process_recent(self):
+        # new purchases, without those we already processed
+        new = await self.poller.poll(lambda y: y.get('emoji_id') not in self.processed_list)
+        if new is None:
             logging.warning("Couldn't get list of recent yat purchases")
             return
-        # filter out those we already processed
-        recent.reverse() # api returns them from most recent to least recent
-        new = [y for y in recent if y.get('emoji_id') not in self.processed_list]
         if not new:
             return
-        self.update_processed_list(new)
+        new = await self.update_processed_list(new)
+        if not new:
+            return
         # send msgs in each livefeed
         msg = "\n".join(["{} (RS{})".format(y.get('emoji_id'), y.get('rhythm_score')) for y in new])
         await self.send(msg)
 
-    @task_feeder.after_loop
-    async def on_task_feeder_cancel(self):
-        self.db.commit()
-        self.db.close()
-        await self.yat_api.close()
-        logging.info("Stopped YatFeeder task")
-
-    def get_recent_yats(self, limit=10):
-        cur = self.db_exec("SELECT yat, rs FROM purch_yats ORDER BY date DESC LIMIT ?", (limit,))
-        return [{'emoji_id': y[0], 'rhythm_score': y[1]} for y in cur]
+    async def get_recent_yats(self, limit=10):
+        lines = await self.db.fetchall("SELECT yat, rs FROM purch_yats ORDER BY ts DESC, id DESC LIMIT ?", (limit,))
+        return [{'emoji_id': y[0], 'rhythm_score': y[1]} for y in lines]
 
 
     
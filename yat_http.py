@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import aiohttp
+
+class TokenBucket:
+    """ client side rate limit: rate requests per second on average, bursts of up to burst requests """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """ take a token and return how long to wait before using it.
+            tokens can go negative, so waiters queue up instead of all waking up at once """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            self.tokens -= 1
+            return 0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+class HttpClient:
+    """ one pooled aiohttp session (keep-alive, dns cache) and one rate limit per host, shared by everything.
+        scripts and executor threads can use it through run_sync """
+    # host: (requests per second, burst)
+    RATE_LIMITS = {
+        'a.y.at': (10, 20),
+        'api.opensea.io': (2, 4),
+    }
+    DEFAULT_RATE_LIMIT = (5, 10)
+    TIMEOUT = 15
+
+    def __init__(self):
+        self.session = None
+        self.loop = None
+        self.pid = None
+        self.buckets = {}
+        self.bg_loop = None
+        self.bg_pid = None
+
+    def get_bucket(self, host):
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = self.buckets[host] = TokenBucket(*self.RATE_LIMITS.get(host, self.DEFAULT_RATE_LIMIT))
+        return bucket
+
+    async def get_session(self):
+        loop = asyncio.get_event_loop()
+        if self.session is not None and self.loop is loop and self.pid == os.getpid():
+            return self.session
+        # sessions are tied to their event loop (and process), scripts using asyncio.run several times get a new one
+        self.drop_session()
+        connector = aiohttp.TCPConnector(limit=100, limit_per_host=20, ttl_dns_cache=300, keepalive_timeout=30)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.TIMEOUT))
+        self.loop = loop
+        self.pid = os.getpid()
+        return self.session
+
+    def drop_session(self):
+        """ let go of the session of another loop or process before replacing it """
+        old, old_loop = self.session, self.loop
+        self.session = None
+        if old is None or old.closed:
+            return
+        if self.pid == os.getpid() and old_loop.is_running():
+            # e.g. the run_sync background loop once the bot's loop takes over: close it on its own loop
+            asyncio.run_coroutine_threadsafe(old.close(), old_loop)
+        else:
+            # a forked worker (the sockets belong to the parent process, closing them here could break its connections)
+            # or a loop that is done: there is no loop to close it on, drop the connector on purpose
+            old.detach()
+
+    async def request(self, method, url, **kwargs):
+        """ returns (status, body), body is the parsed json if the response is json, its text otherwise """
+        await self.get_bucket(urlparse(url).hostname).acquire()
+        s = await self.get_session()
+        async with s.request(method, url, **kwargs) as r:
+            if r.content_type == 'application/json':
+                return r.status, await r.json()
+            return r.status, await r.text()
+
+    async def get_json(self, url, **kwargs):
+        """ parsed json response, or False if the status isn't 200 """
+        status, body = await self.request('GET', url, **kwargs)
+        if status != 200:
+            return False
+        return body
+
+    async def get_conditional(self, url, etag=None, **kwargs):
+        """ GET with If-None-Match. returns (None, etag) if the response didn't change since etag (304),
+            (parsed json, new etag) if it did, (False, etag) on errors """
+        headers = dict(kwargs.pop('headers', None) or {})
+        if etag:
+            headers['If-None-Match'] = etag
+        await self.get_bucket(urlparse(url).hostname).acquire()
+        s = await self.get_session()
+        async with s.get(url, headers=headers, **kwargs) as r:
+            if r.status == 304:
+                return None, etag
+            if r.status != 200:
+                return False, etag
+            return await r.json(content_type=None), r.headers.get('ETag')
+
+    async def post(self, url, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    def run_sync(self, coro):
+        """ run coro from sync code and return its result.
+            from an executor thread of the bot it runs on the bot's loop, so it shares the same connections and limits """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            coro.close()
+            raise RuntimeError("HttpClient.run_sync can't be called from an event loop, use the async api")
+        if self.loop is not None and self.loop.is_running() and self.pid == os.getpid():
+            loop = self.loop
+        else:
+            loop = self.get_bg_loop()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def get_bg_loop(self):
+        # no loop running (scripts, or the bot before it started), run one in a thread
+        if self.bg_loop is None or self.bg_pid != os.getpid():
+            self.bg_loop = asyncio.new_event_loop()
+            self.bg_pid = os.getpid()
+            threading.Thread(target=self.bg_loop.run_forever, name='http-client', daemon=True).start()
+            logging.debug("started the http client background loop")
+        return self.bg_loop
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+client = HttpClient()
@@ -1,8 +1,11 @@
 from PIL import Image, ImageDraw, ImageFont
-import regex
 import math
+import numpy as np
 from io import BytesIO
-from yat_api import get_infos, get_emoji_list
+from yat_api import get_infos
+from yat_catalog import catalog
+from yat_cache import LRUCache
+from yat_utils import split_yat
 
 fonts = [
 	{
@@ -34,38 +37,23 @@ INFO_FONT = ImageFont.truetype("truetype/lberation/LiberationSans-Regular.ttf",
 CREDIT_FONT = ImageFont.truetype("truetype/lberation/LiberationSans-Bold.ttf", 20)
 
 
-emojis = get_emoji_list()
-
 WD = 800
 HT = 1300
 
 def make_background():
-	imgsize = (WD, HT) #The size of the image
-
-	image = Image.new('RGBA', imgsize) #Create the image
-
-	innerColor = [200, 200, 255] #Color at the center
-	outerColor = [80, 80, 255] #Color at the corners
-
-
-	for y in range(imgsize[1]):
-		for x in range(imgsize[0]):
+	#Distance of every pixel to the center, on a scale where 1 is half the diagonal of a WDxWD square
+	y, x = np.ogrid[:HT, :WD]
+	distanceToCenter = np.sqrt((x - WD/2) ** 2 + (y - HT/2) ** 2) / (math.sqrt(2) * WD/2)
+	distanceToCenter = distanceToCenter[..., np.newaxis]
 
-		    #Find the distance to the center
-		    distanceToCenter = math.sqrt((x - imgsize[0]/2) ** 2 + (y - imgsize[1]/2) ** 2)
+	innerColor = np.array([200, 200, 255]) #Color at the center
+	outerColor = np.array([80, 80, 255]) #Color at the corners
 
-		    #Make it on a scale from 0 to 1
-		    distanceToCenter = float(distanceToCenter) / (math.sqrt(2) * imgsize[0]/2)
+	rgb = outerColor * distanceToCenter + innerColor * (1 - distanceToCenter)
+	return Image.fromarray(rgb.astype(np.uint8), 'RGB').convert('RGBA')
 
-		    #Calculate r, g, and b values
-		    r = outerColor[0] * distanceToCenter + innerColor[0] * (1 - distanceToCenter)
-		    g = outerColor[1] * distanceToCenter + innerColor[1] * (1 - distanceToCenter)
-		    b = outerColor[2] * distanceToCenter + innerColor[2] * (1 - distanceToCenter)
-
-
-		    #Place the pixel        
-		    image.putpixel((x, y), (int(r), int(g), int(b)))
-	return image
+# the gradient never changes, build it once and copy it for each image
+BACKGROUND = make_background()
 
 def check_seq(seq):
 	if '<' in seq and '>' in seq:
@@ -73,20 +61,29 @@ def check_seq(seq):
 	if not 1 <= len(seq) <= 5:
 		return False, "Invalid length"
 	for emo in seq:
-		if emo not in emojis and emo + b'\xef\xb8\x8f'.decode() not in emojis: # emojis might have the variation modifier or not. Are they other modifiers that could be annoying like that?
+		if catalog.canonical(emo) is None: # emojis might have the variation selectors or not
 			return False, "Invalid emoji ({})".format(emo)
 	return True, ""
 
-def make_img(seq):
+def normalize_seq(seq):
+	# on the server (with the exact same config as my dev env) it displays the FE0F as an empty or white char...
+	# since we use emoji font we shouldn't need the modifier anyway? So this might fix it
+	return ''.join(seq).replace(b'\xef\xb8\x8f'.decode(), '')
+
+def make_img(seq, strip_infos=None):
 	res, msg = check_seq(seq)
 	if not res:
 		print(msg)
 		return
-	txt = ''.join(seq)
-	# on the server (with the exact same config as my dev env) it displays the FE0F as an empty or white char...
-	# since we use emoji font we shouldn't need the modifier anyway? So this might fix it
-	txt = txt.replace(b'\xef\xb8\x8f'.decode(), '')
-	img = make_background()
+	base = make_base(seq)
+	if strip_infos is None:
+		strip_infos = get_strip_infos(normalize_seq(seq))
+	return finish_img(base, strip_infos)
+
+def make_base(seq):
+	""" everything but the info strip, returns the image and the height where the info strip goes """
+	txt = normalize_seq(seq)
+	img = BACKGROUND.copy()
 	d = ImageDraw.Draw(img)
 	inner_wd = round(0.9*WD)
 	margin = (WD - inner_wd) // 2
@@ -100,8 +97,12 @@ def make_img(seq):
 		emo_strip = make_emo_strip(txt, fnt, inner_wd)
 		img.paste(emo_strip, (margin, y), emo_strip) # alpha from emo_strip used as mask =)
 		y += emo_strip.height + y_spacing
-	
-	info_strip = make_info_strip(txt)
+	return img, y
+
+def finish_img(base, strip_infos):
+	img, y = base
+	img = img.copy()
+	info_strip = make_info_strip(strip_infos)
 	img.paste(info_strip, (0, y), info_strip)
 	#credit_strip = make_credit()
 	#img.paste(credit_strip, (WD-credit_strip.width-2, HT-credit_strip.height-2), credit_strip)
@@ -111,16 +112,53 @@ def make_img(seq):
 	f.seek(0)
 	return f
 
+# emoji tiles of every GlyphAtlas, bounded by their size in memory
+glyph_tiles = LRUCache('glyph atlas', max_size=128 * 1024 * 1024, ttl=float('inf'), sizeof=lambda im: im.width * im.height * 4)
+
+class GlyphAtlas:
+	""" emojis of one font rasterized once at the size they have in the final strip,
+	so making a strip is just pasting a few tiles """
+
+	def __init__(self, font, wd):
+		self.font = font
+		self.wd = wd
+		# same geometry as drawing the whole sequence on a 6.2x1.3 canvas and resizing it to wd
+		self.strip_wd = round(6.2*font['size'])
+		self.strip_ht = round(1.3*font['size'])
+		self.factor = wd / self.strip_wd
+		self.ht = round(self.factor*self.strip_ht)
+
+	def get_tile(self, emo):
+		key = (self.font['name'], self.wd, emo)
+		tile = glyph_tiles.get(key)
+		if tile is None:
+			tile = self.make_tile(emo)
+			glyph_tiles.set(key, tile)
+		return tile
+
+	def make_tile(self, emo):
+		glyph_wd = max(1, math.ceil(self.font['font'].getlength(emo)))
+		glyph = Image.new("RGBA", (glyph_wd, self.strip_ht))
+		d = ImageDraw.Draw(glyph)
+		d.text((0, self.strip_ht//2), emo, anchor="lm", font=self.font['font'], embedded_color=True)
+		return glyph.resize((max(1, round(self.factor*glyph_wd)), self.ht))
+
+	def make_strip(self, txt):
+		tiles = [self.get_tile(emo) for emo in parse_string(txt)]
+		emo_strip = Image.new("RGBA", (self.wd, self.ht))
+		x = (self.wd - sum(tile.width for tile in tiles)) // 2
+		for tile in tiles:
+			emo_strip.paste(tile, (x, 0), tile)
+			x += tile.width
+		return emo_strip
+
+atlases = {}
+
 def make_emo_strip(txt, font, wd):
-	strip_wd = round(6.2*font['size'])
-	strip_ht = round(1.3*font['size'])
-	emo_strip = Image.new("RGBA", (strip_wd, strip_ht))
-	d_strip = ImageDraw.Draw(emo_strip)
-	d_strip.text((strip_wd//2,strip_ht//2), txt, anchor="mm", font=font['font'], embedded_color=True)
-	factor = wd / strip_wd
-	final_ht = round(factor*strip_ht)
-	emo_strip = emo_strip.resize((wd, final_ht))
-	return emo_strip
+	atlas = atlases.get((font['name'], wd))
+	if atlas is None:
+		atlas = atlases[(font['name'], wd)] = GlyphAtlas(font, wd)
+	return atlas.make_strip(txt)
 
 
 def inttohex(n):
@@ -137,18 +175,19 @@ def rs_gradient(rs):
 	blue = math.floor(s - rs * s / 100)
 	return "#{}{}{}".format(*map(inttohex, [red, green, blue]))
 
-def make_info_strip(emoji_id):
-	infos = get_infos(emoji_id).get('res')
+def get_strip_infos(emoji_id):
+	""" fetch the (rs, availability, hype) shown in the info strip """
+	return strip_infos_from(get_infos(emoji_id).get('res'))
+
+def strip_infos_from(infos):
+	""" (rs, availability, hype) shown in the info strip, from the result of a search on the api """
 	if not infos:
-		rs = '?'
-		rs_col = None
-		avail = '???'
-		hype = '???'
-	else:
-		rs = infos.get('rhythm_score')
-		rs_col = rs_gradient(rs)
-		avail = infos.get('availability')
-		hype = min(100, infos.get('stats')[0].get('value'))
+		return ('?', '???', '???')
+	return (infos.get('rhythm_score'), infos.get('availability'), min(100, infos.get('stats')[0].get('value')))
+
+def make_info_strip(strip_infos):
+	rs, avail, hype = strip_infos
+	rs_col = rs_gradient(rs) if rs != '?' else None
 	avail_col = None
 	if avail == "Taken":
 		avail_col = "#CC0000"
@@ -174,7 +213,7 @@ def make_credit():
 	return credit_strip
 
 def parse_string(s):
-	return regex.findall(r'\X', s, regex.U)
+	return split_yat(s)
 
 def find_font_size(font):
 	sizes = []
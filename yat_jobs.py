@@ -0,0 +1,159 @@
+import asyncio
+import json
+import logging
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from yat_api import YatAPI
+from yat_pattern import CompiledPattern, compile_pattern, get_avail, PatternException, PROGRESS_INTERVAL, SCAN_CONCURRENCY, SCAN_RETRIES
+
+class ScanScheduler:
+    """ pattern scans are stored as jobs in sqlite and run a chunk at a time, taking turns between users.
+        progress is checkpointed after each chunk so unfinished jobs resume after a restart """
+    DB_PATH = 'scan_jobs.db'
+    WEEKLY_QUOTA = 5000
+    CHUNK_SIZE = 100
+
+    def __init__(self, on_progress=None, on_done=None, db_path=DB_PATH):
+        # async callbacks, called with the job dict
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.db = sqlite3.connect(db_path)
+        self.task = None
+        self.wakeup = None
+        # user_id -> last time one of their chunks ran, the user who waited the longest goes next
+        self.last_served = {}
+        # job id -> last time on_progress was called for it, so running jobs don't edit their message every chunk
+        self.last_progress = {}
+        self.yat_api = YatAPI()
+        self.init_db()
+
+    def db_exec(self, q, args=()):
+        cur = self.db.cursor()
+        cur.execute(q, args)
+        self.db.commit()
+        return cur
+
+    def init_db(self):
+        self.db_exec("""CREATE TABLE IF NOT EXISTS scan_jobs (id INTEGER PRIMARY KEY, created_date text, user_id int,
+            channel_id int, message_id int, pattern text, total int, checked int, results text, status text)""")
+        if 'compiled' not in [c[1] for c in self.db_exec("PRAGMA table_info(scan_jobs)").fetchall()]:
+            # the nodes and domains the job was submitted with, see CompiledPattern.dumps
+            self.db_exec("ALTER TABLE scan_jobs ADD COLUMN compiled text")
+        self.db_exec("CREATE INDEX IF NOT EXISTS scan_jobs_status ON scan_jobs (status, user_id, id)")
+        self.db_exec("CREATE INDEX IF NOT EXISTS scan_jobs_user ON scan_jobs (user_id, created_date)")
+
+    def scans_used(self, user_id):
+        since = (datetime.now(tz=timezone.utc) - timedelta(days=7)).isoformat()
+        cur = self.db_exec("SELECT COALESCE(SUM(total), 0) FROM scan_jobs WHERE user_id=? AND created_date > ? AND status != 'failed'",
+            (user_id, since))
+        return cur.fetchone()[0]
+
+    def scans_remaining(self, user_id):
+        return max(0, self.WEEKLY_QUOTA - self.scans_used(user_id))
+
+    def submit(self, user_id, channel_id, message_id, pattern, compiled):
+        total = compiled.count()
+        remaining = self.scans_remaining(user_id)
+        if total > remaining:
+            raise PatternException("Sorry, your pattern matches {} yats but you only have {} scans remaining this week".format(total, remaining))
+        cur = self.db_exec("""INSERT INTO scan_jobs (created_date, user_id, channel_id, message_id, pattern, compiled, total, checked, results, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 0, '[]', 'queued')""",
+            (datetime.now(tz=timezone.utc).isoformat(), user_id, channel_id, message_id, pattern, compiled.dumps(), total))
+        if self.wakeup is not None:
+            self.wakeup.set()
+        return cur.lastrowid
+
+    def set_message(self, job_id, message_id):
+        self.db_exec("UPDATE scan_jobs SET message_id=? WHERE id=?", (message_id, job_id))
+
+    def queue_position(self, job_id):
+        cur = self.db_exec("SELECT COUNT(*) FROM scan_jobs WHERE status='queued' AND id < ?", (job_id,))
+        return cur.fetchone()[0]
+
+    def next_job(self):
+        # oldest unfinished job of each user
+        cur = self.db_exec("SELECT MIN(id), user_id FROM scan_jobs WHERE status='queued' GROUP BY user_id")
+        jobs = cur.fetchall()
+        if not jobs:
+            return None
+        job_id, user_id = min(jobs, key=lambda j: (self.last_served.get(j[1], 0), j[0]))
+        return self.get_job(job_id)
+
+    def get_job(self, job_id):
+        cur = self.db_exec("SELECT id, user_id, channel_id, message_id, pattern, compiled, total, checked, results, status FROM scan_jobs WHERE id=?", (job_id,))
+        line = cur.fetchone()
+        if line is None:
+            return None
+        return {
+            'id': line[0], 'user_id': line[1], 'channel_id': line[2], 'message_id': line[3], 'pattern': line[4], 'compiled': line[5],
+            'total': line[6], 'checked': line[7], 'results': json.loads(line[8]), 'status': line[9],
+        }
+
+    def checkpoint(self, job):
+        self.db_exec("UPDATE scan_jobs SET checked=?, results=?, status=? WHERE id=?",
+            (job['checked'], json.dumps(job['results']), job['status'], job['id']))
+
+    async def run_chunk(self, job):
+        # resume from the domains the job was submitted with, a catalog refresh may have changed them since.
+        # jobs from before the compiled column are compiled again
+        if job['compiled']:
+            compiled = CompiledPattern.loads(job['compiled'])
+        else:
+            compiled = compile_pattern(job['pattern'])
+        ids = list(islice(compiled, job['checked'], job['checked'] + self.CHUNK_SIZE))
+        async for emoji_id, infos in self.yat_api.iter_infos(ids, concurrency=SCAN_CONCURRENCY, retries=SCAN_RETRIES):
+            if not infos:
+                logging.info('pattern scan: Skipping ' + emoji_id)
+                continue
+            avail = get_avail(infos)
+            if avail:
+                job['results'].append(avail)
+        job['checked'] += len(ids)
+        if not ids or job['checked'] >= job['total']:
+            job['status'] = 'done'
+        self.checkpoint(job)
+
+    def start(self):
+        if self.task is not None:
+            return
+        logging.info("Starting ScanScheduler task")
+        loop = asyncio.get_event_loop()
+        self.task = loop.create_task(self.run())
+
+    async def run(self):
+        self.wakeup = asyncio.Event()
+        while True:
+            job = self.next_job()
+            if job is None:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            now = asyncio.get_event_loop().time()
+            self.last_served[job['user_id']] = now
+            self.last_progress.setdefault(job['id'], now)
+            try:
+                await self.run_chunk(job)
+            except asyncio.CancelledError:
+                raise
+            except PatternException:
+                # the catalog changed and the pattern isn't valid anymore
+                logging.exception("Scan job {} failed:".format(job['id']))
+                job['status'] = 'failed'
+                self.checkpoint(job)
+            except Exception:
+                logging.exception("Error while running scan job {}:".format(job['id']))
+                await asyncio.sleep(5)
+                continue
+            try:
+                if job['status'] == 'queued':
+                    if self.on_progress is not None and asyncio.get_event_loop().time() - self.last_progress[job['id']] > PROGRESS_INTERVAL:
+                        self.last_progress[job['id']] = asyncio.get_event_loop().time()
+                        await self.on_progress(job)
+                else:
+                    self.last_progress.pop(job['id'], None)
+                    if self.on_done is not None:
+                        await self.on_done(job)
+            except Exception:
+                logging.exception("Error in scan job {} callback:".format(job['id']))
@@ -1,10 +1,10 @@
 import asyncio
 import logging
-import aiohttp
 import datetime
 
 from yat_twitter import TwitterBot
 from yat_api import YatAPI
+from yat_http import client
 from yat_utils import get_yat_from_url, split_yat, twitter_sanitize
 import config
 
@@ -20,7 +20,6 @@ class OpenseaFeeder:
 
     def __init__(self, discord=None):
         self.task = None
-        self.aiosession = None
 
         # remember start time so we can filter out the yats bought before that we haven't stored
         self.startup_time = int(datetime.datetime.now().timestamp())
@@ -52,8 +51,6 @@ class OpenseaFeeder:
                 await self.check_new_sales()
                 await asyncio.sleep(self.REFRESH_INTERVAL)
             except asyncio.CancelledError:
-                if self.aiosession is not None:
-                    await self.aiosession.close()
                 await self.yat_api.close()
                 self.task = None
                 logging.info("Stopped OpenseaFeeder task")
@@ -162,7 +159,6 @@ class OpenseaFeeder:
         "   event_type can be 'created' for new auctions, 'successful' for sales, 
         "   'cancelled', 'bid_entered', 'bid_withdrawn', 'transfer', or 'approve'
         """
-        s = await self.get_aiosession()
         url = self.API_URL + "/events"
         params = {
             "asset_contract_address": self.CONTRACT_ADDRESS,
@@ -171,17 +167,10 @@ class OpenseaFeeder:
             "limit": 25,
             #"offset": 0
         }
-        async with s.get(url, params=params, headers={'X-API-KEY': config.OPENSEA_API_KEY}) as r:
-            if r.status != 200:
-                return False
-            json_resp = await r.json()
-            return json_resp.get('asset_events')
-
-    async def get_aiosession(self):
-        if self.aiosession is not None:
-            return self.aiosession
-        self.aiosession = aiohttp.ClientSession()
-        return self.aiosession
+        json_resp = await client.get_json(url, params=params, headers={'X-API-KEY': config.OPENSEA_API_KEY})
+        if json_resp is False:
+            return False
+        return json_resp.get('asset_events')
 
 if __name__ == "__main__":
     feeder = OpenseaFeeder()
@@ -1,14 +1,19 @@
-from yat_api import get_emoji_list, YatAPI
+from yat_api import YatAPI
+from yat_catalog import catalog
 from yat_utils import split_yat
 
 import regex
 from itertools import product
+from math import prod
+from collections import namedtuple
+import json
 import logging
 import asyncio
 import sys
 import string
+import time
 
-emojis = get_emoji_list()    
+emojis = catalog
 
 class PatternException(Exception):
     pass
@@ -16,27 +21,22 @@ class PatternException(Exception):
 def check_id(seq):
     if not 1 <= len(seq) <= 5:
         return False
-    for emo in seq:
-        if emo not in emojis:
-            return False
-    return True
+    return emojis.canonical_seq(seq) is not None
+
+MAX_YATS = 5000
 
 def get_yats_from_pattern(pattern):
     logging.info("performing a search for pattern {}".format(pattern))
-    if len(set(regex.findall('[A-Z]', pattern))) > 5:
-        raise PatternException("Error: you can't use more than 5 variables")
-    if len(split_yat(pattern)) > 100:
-        raise PatternException("Error: your pattern can't be longer than 100 chars")
-    q = set()
-    ids = set()
-    parse_pattern(pattern, q, ids)
-    while q:
-        p = q.pop()
-        parse_pattern(p, q, ids)
+    compiled = compile_pattern(pattern)
+    check_count(compiled.count())
+    ids = set(compiled)
     logging.debug(len(ids))
-    logging.debug(ids)
     return ids
 
+def check_count(count):
+    if count > MAX_YATS:
+        raise PatternException("Sorry, your pattern matches {} yats, the maximum is {}. Please change your pattern and try again".format(count, MAX_YATS))
+
 # v2: simpler, betterer
 # A, B, C, D, E = any emoji, same letter = same emoji
 # Af -> only faces, Ao -> objects, Afo -> face & objects ....
@@ -54,98 +54,168 @@ SYMBOLS_EMOJIS = []
 def get_emojis(mods=None):
     if not mods:
         return emojis
-    s = set()
+    # a dict rather than a set, the order of the emojis (and so of the generated yats) must not depend on
+    # the hash seed, scan jobs resume by skipping the yats they already checked
+    s = {}
     for m in mods:
         if m == 'f': # face
-            s.update(FACE_EMOJIS)
+            s.update(dict.fromkeys(FACE_EMOJIS))
         elif m == 'b': # bookends
-            s.update(BOOKEND_EMOJIS)
+            s.update(dict.fromkeys(BOOKEND_EMOJIS))
         else:
             raise PatternException("Error: unrecognized modifier '{}'".format(m))
-    return s
+    return list(s)
+
+Literal = namedtuple('Literal', 'emoji')
+# a bracket set is stored in choices, modifiers in mods
+Variable = namedtuple('Variable', 'name mods choices')
+
+class CompiledPattern:
+    """ a parsed pattern: one node per emoji of the yats it matches, and the emojis each variable can take """
+
+    def __init__(self, nodes, domains):
+        self.nodes = nodes
+        self.domains = domains
+
+    def count(self):
+        """ exact number of yats matching the pattern, without generating them """
+        return prod(len(d) for d in self.domains.values())
+
+    def dumps(self):
+        """ json of the nodes and resolved domains: a scan job resumes from it, so it generates the same yats
+            in the same order even if the catalog changed in the meantime """
+        return json.dumps({
+            'nodes': [[n.name] if isinstance(n, Variable) else n.emoji for n in self.nodes],
+            'domains': list(self.domains.items()),
+        }, ensure_ascii=False)
+
+    @classmethod
+    def loads(cls, s):
+        data = json.loads(s)
+        # only the names of the variables matter once the domains are resolved
+        nodes = [Variable(n[0], [], None) if isinstance(n, list) else Literal(n) for n in data['nodes']]
+        return cls(nodes, {name: tuple(domain) for name, domain in data['domains']})
+
+    def __iter__(self):
+        """ lazily generate every yat matching the pattern """
+        names = list(self.domains)
+        # template of the yat, with the index of the variable for each position that isn't a literal
+        template = [names.index(n.name) if isinstance(n, Variable) else n.emoji for n in self.nodes]
+        for values in product(*(self.domains[name] for name in names)):
+            yield ''.join(values[t] if isinstance(t, int) else t for t in template)
+
+def compile_pattern(pattern):
+    if len(set(regex.findall('[A-Z]', pattern))) > 5:
+        raise PatternException("Error: you can't use more than 5 variables")
+    nodes = parse_pattern(pattern)
+    if not 1 <= len(nodes) <= 5:
+        raise PatternException("Error: your pattern must match yats of 1 to 5 emojis")
+    return CompiledPattern(nodes, get_domains(nodes))
 
-def parse_pattern(pattern, q, ids):
-    logging.debug("parsing pattern" + pattern)
+def parse_pattern(pattern):
+    logging.debug("parsing pattern " + pattern)
     # remove spaces and split pattern in chars
-    pattern = split_yat(pattern.replace(' ', ''))
-    # check if we have a valid yat
-    if check_id(pattern):
-        ids.add(''.join(pattern))
-        return
-    # we still have things to parse
-    q_complexity = 0
+    chars = split_yat(pattern.replace(' ', ''))
+    if len(chars) > 100:
+        raise PatternException("Error: your pattern can't be longer than 100 chars")
+    nodes = []
     i = 0
-    while i < len(pattern):
-        logging.debug("queue: {}, queue complexity: {}, valid ids: {}".format(len(q), q_complexity, len(ids)))
-        if len(q) > 5000 or len(ids) > 5000 or q_complexity > 500:
-            raise PatternException("Sorry, your pattern is too complex. Please change your pattern and try again")
-        c = pattern[i]
+    while i < len(chars):
+        c = chars[i]
+        i += 1
         if c in string.ascii_uppercase:
-            logging.debug("found var {}".format(c))
-            if i < len(pattern)-1 and pattern[i+1] == "[":
-                logging.debug("parsing brackets")
-                # find index of closing bracket
+            mods = []
+            choices = None
+            if i < len(chars) and chars[i] == "[":
                 try:
-                    end_idx = pattern.index("]")
+                    end_idx = chars.index("]", i)
                 except ValueError:
                     raise PatternException("Error: unclosed brackets")
-                # extract emojis inside brackets
-                sub_emojis = set(pattern[i+2:end_idx])
-                if not sub_emojis.issubset(emojis):
+                if end_idx == i + 1:
+                    raise PatternException("Error: empty brackets")
+                # generated yats use the catalog form of the emojis, whatever selectors the user typed
+                choices = emojis.canonical_seq(chars[i+1:end_idx])
+                if choices is None:
                     raise PatternException("Error: non-emoji character inside brackets")
-                # remake the split pattern without the brackets following any occurence of the var
-                pattern = split_yat(regex.sub(r"{}\[.*?\]".format(c), c, ''.join(pattern)))
+                i = end_idx + 1
             else:
-                mods = []
-                for j in range(i+1, len(pattern)):
-                    if pattern[j] in string.ascii_lowercase:
-                        mods.append(pattern[j])
-                    else:
-                        break
-                logging.debug("  mods: {}".format(mods))
-                sub_emojis = get_emojis(mods)
-            # replace all occurence of the variable (and it's mods if any) with "[REP]"
-            pattern_rep = regex.sub(r"{}[a-z]*".format(c), "[REP]", ''.join(pattern))
-            # add new patterns with substituted vars to the queue
-            q.update([pattern_rep.replace("[REP]", e) for e in sub_emojis])
-            # remake the split pattern without the var we just handled
-            pattern_rep = pattern_rep.replace("[REP]", "_")
-            pattern = split_yat(pattern_rep)
-            # avoid getting in too deep by determining the complexity added to the queue
-            # i'm too tired to do it properly, should be enough to prevent at least accidental dos
-            q_complexity += len(sub_emojis) * len(set(regex.findall('[A-Z]', pattern_rep)))
+                while i < len(chars) and chars[i] in string.ascii_lowercase:
+                    mods.append(chars[i])
+                    i += 1
+            nodes.append(Variable(c, tuple(mods), tuple(choices) if choices else None))
         elif c == ']':
             raise PatternException("Error: unmatched closing bracket")
-        elif c not in emojis and c != '_':
+        elif emojis.canonical(c) is not None:
+            nodes.append(Literal(emojis.canonical(c)))
+        else:
             raise PatternException("Error: unrecognized character or emoji '{}'".format(c))
-        i += 1
-        
-async def scan(ids):
-    logging.info("checking availability of {} yats".format(len(ids)))
+    return nodes
+
+def get_domains(nodes):
+    """ emojis each variable can take, in order of first appearance.
+        same letter = same emoji, so only one occurrence of a variable needs modifiers or brackets """
+    specs = {}
+    for n in nodes:
+        if not isinstance(n, Variable):
+            continue
+        spec = (n.mods, n.choices)
+        current = specs.get(n.name)
+        if current is None or not any(current):
+            specs[n.name] = spec
+        elif any(spec) and spec != current:
+            raise PatternException("Error: variable {} has different modifiers or brackets".format(n.name))
+    domains = {}
+    for name, (mods, choices) in specs.items():
+        if choices:
+            # keep the order but drop duplicates
+            domains[name] = tuple(dict.fromkeys(choices))
+        else:
+            # the modifier lists are hand made, only keep what yat actually supports, in its catalog form
+            domains[name] = tuple(dict.fromkeys(c for c in map(emojis.canonical, get_emojis(mods)) if c is not None))
+    return domains
+
+SCAN_CONCURRENCY = 10
+SCAN_RETRIES = 3
+PROGRESS_INTERVAL = 5
+
+async def scan(ids, total=None, progress=None, concurrency=SCAN_CONCURRENCY):
+    """ check the availability of ids (any iterable), at most concurrency at a time.
+        progress(checked, total, available) is awaited at most every PROGRESS_INTERVAL seconds """
+    logging.info("checking availability of {} yats".format(total))
     avails = []
+    checked = 0
+    last_progress = time.monotonic()
     yat_api = YatAPI()
-    res_all = await yat_api.get_infos_bulk(ids)
-    for i, res in enumerate(res_all):
-        infos = res.get('result')
-        # if we didn't get the infos for an emoji_id try again once
-        if not infos:
-            infos = await yat_api.get_infos(res.get('emoji_id'))
-        # if we still don't have it, skip
-        if not infos:
-            logging.info('pattern scan: Skipping ' + res.get('emoji_id'))
-            continue
-        avail = infos.get('availability')
-        if avail != 'Taken':
-            avails.append({
-                'id': infos.get('emoji_id'), 
-                'rs': infos.get('rhythm_score'), 
-                'availability': avail,
-                'price': infos.get('price', 0)/100,
-                'disc_price': infos.get('discounted_price', 0)/100,
-            })
-    await yat_api.close()
+    try:
+        async for emoji_id, infos in yat_api.iter_infos(ids, concurrency=concurrency, retries=SCAN_RETRIES):
+            checked += 1
+            if progress is not None and time.monotonic() - last_progress > PROGRESS_INTERVAL:
+                last_progress = time.monotonic()
+                await progress(checked, total, len(avails))
+            # if we still don't have it after the retries, skip
+            if not infos:
+                logging.info('pattern scan: Skipping ' + emoji_id)
+                continue
+            avail = get_avail(infos)
+            if avail:
+                avails.append(avail)
+    finally:
+        await yat_api.close()
     return format_results(avails)
-            
+
+def get_avail(infos):
+    """ the scan result for a yat that isn't taken, None if it is """
+    avail = infos.get('availability')
+    if avail == 'Taken':
+        return None
+    return {
+        'id': infos.get('emoji_id'), 
+        'rs': infos.get('rhythm_score'), 
+        'availability': avail,
+        'price': infos.get('price', 0)/100,
+        'disc_price': infos.get('discounted_price', 0)/100,
+    }
+
 def format_results(res):
     if len(res) > 0:
         s = "{} Yats matching this pattern are still available:\n".format(len(res))
@@ -162,7 +232,9 @@ if __name__ == "__main__":
         pattern = 'Ab😎A'
     else:
         pattern = sys.argv[1]
-    yats = get_yats_from_pattern(pattern)
-    input("Scan {} yats?".format(len(yats)))
-    result = asyncio.run(scan(yats))
+    compiled = compile_pattern(pattern)
+    count = compiled.count()
+    check_count(count)
+    input("Scan {} yats?".format(count))
+    result = asyncio.run(scan(compiled, total=count))
     print(result)
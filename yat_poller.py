@@ -0,0 +1,78 @@
+import hashlib
+import json
+import logging
+import time
+
+class AdaptivePoller:
+    """ polls the recent purchases of a.y.at. the interval follows the purchase rate between min_interval and max_interval,
+        responses that didn't change (same etag or same content) are skipped without going through them.
+        a poll where every purchase is new means some might have been missed, so it polls again faster """
+    DEFAULT_INTERVAL = 30
+    # aim for this fraction of the page to be new at each poll, so a page never fills up between two polls
+    TARGET_FILL = 0.5
+    # how much the interval can grow at once when nothing happens
+    SLOWDOWN = 1.5
+
+    def __init__(self, yat_api, min_interval=10, max_interval=120):
+        self.yat_api = yat_api
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min(max(self.DEFAULT_INTERVAL, min_interval), max_interval)
+        self.etag = None
+        self.content_hash = None
+        self.last_poll = None
+        self.page_size = 0
+        self.rate = None # new purchases per second, moving average
+        self.polls = 0
+        self.unchanged = 0
+        self.gaps = 0
+
+    async def poll(self, is_new):
+        """ the new purchases (is_new(purchase) tells which ones we haven't seen), oldest first.
+            None if the request failed """
+        now = time.monotonic()
+        elapsed = now - self.last_poll if self.last_poll is not None else None
+        recent, self.etag = await self.yat_api.get_recent_purchases_conditional(self.etag)
+        if recent is False:
+            return None
+        self.polls += 1
+        self.last_poll = now
+        if recent is None:
+            self.unchanged += 1
+            self.observe(0, elapsed, gap=False)
+            return []
+        content_hash = hashlib.sha1(json.dumps([y.get('emoji_id') for y in recent]).encode()).digest()
+        if content_hash == self.content_hash:
+            self.unchanged += 1
+            self.observe(0, elapsed, gap=False)
+            return []
+        first_poll = self.content_hash is None
+        self.content_hash = content_hash
+        self.page_size = max(self.page_size, len(recent))
+        recent.reverse() # api returns them from most recent to least recent
+        new = [y for y in recent if is_new(y)]
+        # on the first poll everything might be new just because we were offline
+        gap = not first_poll and len(new) == len(recent) > 0
+        if gap:
+            self.gaps += 1
+            logging.warning("Every recent purchase was new ({}), some purchases might have been missed".format(len(new)))
+        self.observe(len(new), elapsed, gap)
+        return new
+
+    def observe(self, new_count, elapsed, gap):
+        if gap:
+            self.interval = self.min_interval
+            return
+        if elapsed:
+            sample = new_count / elapsed
+            # follow rises right away (drops start suddenly), decrease slowly
+            self.rate = sample if self.rate is None else max(sample, 0.7 * self.rate + 0.3 * sample)
+        if not self.rate or not self.page_size:
+            interval = self.interval * self.SLOWDOWN
+        else:
+            interval = min(self.page_size * self.TARGET_FILL / self.rate, self.interval * self.SLOWDOWN)
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+
+    def format_stats(self):
+        return "recent purchases poller: every {:.0f}s, {:.2f} purchases/min, {} polls ({} unchanged), {} gaps".format(
+            self.interval, (self.rate or 0) * 60, self.polls, self.unchanged, self.gaps)
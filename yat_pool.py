@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+class RenderQueueBusy(Exception):
+    pass
+
+class RenderPool:
+    """ runs renders in worker processes (or threads) so they don't block the event loop, initializer warms the workers up """
+
+    def __init__(self, workers=2, max_pending=8, timeout=30, processes=True, initializer=None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.processes = processes
+        self.initializer = initializer
+        self.executor = self.new_executor()
+
+    def new_executor(self):
+        executor_cls = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+        return executor_cls(max_workers=self.workers, initializer=self.initializer)
+
+    def restart(self, broken):
+        """ replace a broken executor (a worker died: OOM, segfault...), unless another call already did """
+        if self.executor is not broken:
+            return
+        logging.warning("render pool is broken, restarting its workers")
+        broken.shutdown(wait=False)
+        self.executor = self.new_executor()
+
+    def warm(self):
+        # executors only spawn their workers on submit
+        for _ in range(self.workers):
+            self.executor.submit(int)
+
+    def release(self):
+        self.pending -= 1
+
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            raise RenderQueueBusy("The render queue is busy, please try again in a few seconds")
+        try:
+            return await self.submit(fn, *args)
+        except BrokenProcessPool:
+            # the render that killed the worker may not be this one, try once more on fresh workers
+            return await self.submit(fn, *args)
+
+    async def submit(self, fn, *args):
+        loop = asyncio.get_event_loop()
+        executor = self.executor
+        try:
+            cf = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self.restart(executor)
+            raise
+        # the slot is only released when the worker is actually done, even if we stopped waiting for it
+        self.pending += 1
+        cf.add_done_callback(lambda f: loop.call_soon_threadsafe(self.release))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(cf), self.timeout)
+        except asyncio.TimeoutError:
+            logging.warning("render of {} timed out after {}s".format(fn.__name__, self.timeout))
+            raise
+        except BrokenProcessPool:
+            self.restart(executor)
+            raise
+
+    def close(self):
+        self.executor.shutdown(wait=False)
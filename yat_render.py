@@ -0,0 +1,13 @@
+import yat_image
+
+def warm_worker():
+    # fonts and the background template are loaded when yat_image is imported,
+    # render one strip per font so the first real request doesn't pay for the glyph atlas setup either
+    for fnt in yat_image.fonts:
+        yat_image.make_emo_strip("🐣", fnt, round(0.9*yat_image.WD))
+
+def render_base(seq):
+    return yat_image.make_base(seq)
+
+def render_finish(base, strip_infos):
+    return yat_image.finish_img(base, strip_infos).getvalue()
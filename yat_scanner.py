@@ -1,5 +1,6 @@
 
 from yat_api import is_emoji_out, get_emoji_list
+from yat_catalog import catalog
 import config
 
 from discord.ext import tasks
@@ -16,15 +17,19 @@ class YatScanner:
         self.bot = bot
         self.last_scan = None
         self.sent_notifs = []
-        self.initial_list = get_emoji_list()
+        self.initial_list = list(catalog)
     
     def is_running(self):
         return self.task_scanner.is_running()
     
     def start(self):
+        # the sync api can't be used from the event loop
+        self.bot.loop.create_task(self.check_and_start())
+
+    async def check_and_start(self):
         if not self.initial_list:
             logging.warning("Scanner initial list wasn't initialized correctly. Not starting task")
-        elif True in scan():
+        elif True in await self.bot.loop.run_in_executor(None, scan):
             logging.warning("One of the ComingSoon emoji is available! Are you sure that's not a mistake? Not starting task")
         else:
             logging.info('Starting scanner task')
@@ -38,6 +43,7 @@ class YatScanner:
             new_emos = set(newlist) - set(self.initial_list)
             await self.alert("[ALERT] New emoji might be coming soon: " + ', '.join(new_emos))
             self.initial_list = newlist
+            catalog.update(newlist)
 
         # for each emoji in the ComingSoon list, see if it changed
         res = await self.bot.loop.run_in_executor(None, scan)
@@ -1,149 +1,269 @@
+import csv
+import gzip
+import json
 import sqlite3
-import regex
-from collections import Counter
 from datetime import datetime, date, timedelta
 
+import matplotlib
+if __name__ != '__main__':
+    # imported by the bot or its chart workers: headless, the backend has to be set before pyplot is imported.
+    # run as a script it keeps the default backend to show the charts
+    matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+import numpy as np
 
-from yat_utils import split_yat
+from yat_db import migrate, day_range, count_by_length, top_emojis
+from yat_utils import split_many
 
-def load_yats(start, end):
-    db = sqlite3.connect('feed.db')
-    cur = db.cursor()
-    cur.execute("SELECT date, yat, rs FROM purch_yats WHERE date(date) BETWEEN ? AND ?", (start.isoformat(), end.isoformat()))
-    return [{'date': datetime.fromisoformat(y[0]), 'emoji_id': y[1], 'rs': y[2]} for y in cur.fetchall()]
+class YatDataset:
+    """ purchases stored by column: one numpy array per field, emojis interned as ints.
+        emojis[i, j] is the id of the j-th emoji of the i-th yat (-1 after its last emoji), vocab[id] is the emoji """
+    MAX_LENGTH = 5
 
-def split_yats(yats):
-    emojis = []
-    for y in yats:
-        emojis += split_yat(y['emoji_id'])
-    return emojis
+    def __init__(self, dates, yats, rs, lengths, emojis, vocab):
+        self.dates = dates # epoch seconds (UTC)
+        self.yats = yats
+        self.rs = rs
+        self.lengths = lengths
+        self.emojis = emojis
+        self.vocab = vocab
 
-def print_top(t, n=10):
-    top = Counter(t).most_common(n)
+    def __len__(self):
+        return len(self.dates)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """ rows of (epoch, yat, rs) """
+        rows = list(rows)
+        n = len(rows)
+        dates = np.fromiter((r[0] for r in rows), dtype=np.int64, count=n)
+        rs = np.fromiter((r[2] or 0 for r in rows), dtype=np.int32, count=n)
+        yats = [r[1] for r in rows]
+        emojis = np.full((n, cls.MAX_LENGTH), -1, dtype=np.int32)
+        lengths = np.zeros(n, dtype=np.int8)
+        index = {}
+        vocab = []
+        for i, split in enumerate(split_many(yats)):
+            split = split[:cls.MAX_LENGTH]
+            lengths[i] = len(split)
+            for j, emo in enumerate(split):
+                eid = index.get(emo)
+                if eid is None:
+                    eid = index[emo] = len(vocab)
+                    vocab.append(emo)
+                emojis[i, j] = eid
+        return cls(dates, np.array(yats, dtype=object), rs, lengths, emojis, vocab)
+
+    def at(self, pos):
+        """ ids of the emoji at position pos of each yat, negative positions count from the end """
+        if pos >= 0:
+            return self.emojis[:, pos]
+        return self.emojis[np.arange(len(self)), np.maximum(self.lengths + pos, 0)]
+
+def open_db(db_path='feed.db'):
+    db = sqlite3.connect(db_path)
+    migrate(db)
+    return db
+
+def load_yats(start, end, db=None):
+    db = db or open_db()
+    cur = db.execute("SELECT ts, yat, rs FROM purch_yats WHERE ts >= ? AND ts < ? ORDER BY id", day_range(start, end))
+    return YatDataset.from_rows(cur.fetchall())
+
+def most_common(keys, n=10):
+    """ like Counter(keys).most_common(n): ties are in order of first appearance """
+    values, first, counts = np.unique(keys, return_index=True, return_counts=True)
+    order = np.lexsort((first, -counts))[:n]
+    return [(values[i], int(counts[i])) for i in order]
+
+def top_ids(ds, ids, n=10):
+    """ the n most common emojis of ids (emoji ids), with their count """
+    return [(ds.vocab[i], cnt) for i, cnt in most_common(ids[ids >= 0], n)]
+
+def print_top(top):
     for i, e in enumerate(top):
         print('{}: {} ({})'.format(i+1, e[0], e[1]))
 
-def get_count_by_length(yats, n):
-    return len([True for y in yats if len(split_yat(y['emoji_id'])) == n])
+def get_count_by_length(ds, n):
+    return int(np.count_nonzero(ds.lengths == n))
+
+EXPORT_BATCH = 10000
+
+def iter_purchases(db, start=None, end=None, batch=EXPORT_BATCH):
+    """ (date, yat, rs, length) rows bought between the start and end dates (all of them by default), batch rows at a time """
+    start, end = day_range(start or date.min, end or date(9998, 12, 31))
+    cur = db.execute("SELECT date, yat, rs, length FROM purch_yats WHERE ts >= ? AND ts < ? ORDER BY id", (start, end))
+    while True:
+        rows = cur.fetchmany(batch)
+        if not rows:
+            return
+        yield rows
+
+def open_export(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', encoding='utf-8', newline='', compresslevel=6)
+    return open(path, 'w', encoding='utf-8', newline='', buffering=1 << 20)
+
+def export(path='stats.csv', start=None, end=None, db=None):
+    """ stream purchases to a csv or json lines file (.csv, .jsonl, optionally followed by .gz), in constant memory """
+    db = db or open_db()
+    jsonl = path.replace('.gz', '').endswith('.jsonl')
+    count = 0
+    with open_export(path) as f:
+        if jsonl:
+            dumps = json.JSONEncoder(ensure_ascii=False).encode
+        else:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(('date', 'yat', 'rs', 'length'))
+        for rows in iter_purchases(db, start, end):
+            splits = split_many(r[1] for r in rows)
+            if jsonl:
+                f.write(''.join(dumps({'date': r[0], 'emoji_id': r[1], 'emojis': s, 'rs': r[2], 'length': r[3]}) + '\n'
+                    for r, s in zip(rows, splits)))
+            else:
+                writer.writerows((r[0], '-'.join(s), r[2], r[3]) for r, s in zip(rows, splits))
+            count += len(rows)
+    return count
+
+def save_snapshot(ds, path='stats_snapshot.npz'):
+    """ binary columnar copy of a dataset, load_snapshot reads it back without sqlite or splitting yats """
+    yats = '\n'.join(ds.yats).encode()
+    np.savez(path, dates=ds.dates, rs=ds.rs, lengths=ds.lengths, emojis=ds.emojis,
+        vocab=np.array(ds.vocab, dtype=str), yats=np.frombuffer(yats, dtype=np.uint8))
 
-def export_csv(yats):
-    with open('stats.csv', 'w+') as f:
-        f.write('date,yat,rs,length\n')
-        for y in yats:
-            f.write('{},{},{},{}\n'.format(y['date'], '-'.join(split_yat(y['emoji_id'])), y['rs'], len(split_yat(y['emoji_id']))))
+def load_snapshot(path='stats_snapshot.npz'):
+    with np.load(path) as f:
+        yats = f['yats'].tobytes().decode().split('\n') if len(f['dates']) else []
+        return YatDataset(f['dates'], np.array(yats, dtype=object), f['rs'], f['lengths'], f['emojis'], f['vocab'].tolist())
 
-def create_rs_chart(yats):
+def create_rs_chart(ds):
+    rs_chart_figure(ds)
+    plt.show()
+
+def rs_chart_figure(ds):
     fig, ax = plt.subplots()
-    plot_rs_for_length(ax, yats, 3, color='red')
-    plot_rs_for_length(ax, yats, 4, color='blue')
-    plot_rs_for_length(ax, yats, 5, color='green')
+    plot_rs_for_length(ax, ds, 3, color='red')
+    plot_rs_for_length(ax, ds, 4, color='blue')
+    plot_rs_for_length(ax, ds, 5, color='green')
     fig.autofmt_xdate()
     fig.legend(loc='center right')
     fig.suptitle('RS of created Yats of different lengths over time')
+    return fig
+
+def plot_rs_for_length(ax, ds, n, color=None):
+    mask = ds.lengths == n
+    x = ds.dates[mask].astype('datetime64[s]')
+    y = ds.rs[mask]
+    # same as the deprecated plot_date: markers only, on a date axis
+    ax.plot(x, y, 'o', ms=2, mec=color, mfc=color, label='{}x yats'.format(n))
+
+def print_top_by_rs(ds, n=10):
+    # stable, so yats with the same RS stay in purchase order
+    top = np.argsort(-ds.rs, kind='stable')[:n]
+    for i, idx in enumerate(top):
+        print('{}: {} (RS{})'.format(i+1, ds.yats[idx], ds.rs[idx]))
+
+# bucket widths of time_chart, in seconds
+BUCKET_WIDTHS = {
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400,
+    'week': 7 * 86400,
+}
+
+def bucket_counts(ds, start, end, width, by_length=False):
+    """ number of purchases in each bucket of width seconds from start to end (epochs, end excluded), in a single pass.
+        with by_length it returns one row of counts per yat length (row n = yats of n emojis) """
+    n_buckets = -(-(end - start) // width)
+    mask = (ds.dates >= start) & (ds.dates < end)
+    idx = (ds.dates[mask] - start) // width
+    if not by_length:
+        return np.bincount(idx, minlength=n_buckets)
+    rows = YatDataset.MAX_LENGTH + 1
+    return np.bincount(ds.lengths[mask].astype(np.int64) * n_buckets + idx, minlength=rows * n_buckets).reshape(rows, n_buckets)
+
+def time_chart(ds, start, end, hourly=False, bucket=None, by_length=False):
+    time_chart_figure(ds, start, end, bucket or ('hour' if hourly else 'day'), by_length=by_length)
     plt.show()
 
-def plot_rs_for_length(ax, yats, n, color=None):
-    yats = [yat for yat in yats if len(split_yat(yat['emoji_id'])) == n]
-    x = [yat['date'] for yat in yats]
-    y = [yat['rs'] for yat in yats]
-    ax.plot_date(x, y, xdate=True, ms=2, mec=color, mfc=color, label='{}x yats'.format(n))
-
-def print_top_by_rs(yats, n=10):
-    top = sorted(yats, key=lambda y: y['rs'], reverse=True)[:n]
-    for i, yat in enumerate(top):
-        print('{}: {} (RS{})'.format(i+1, yat['emoji_id'], yat['rs']))
-
-def time_chart(yats, start, end, hourly=False):
-    start = datetime(year=start.year, month=start.month, day=start.day)
-    end = datetime(year=end.year, month=end.month, day=end.day, hour=23)
-    x = []
-    while start <= end:
-        x.append(start)
-        if hourly:
-            start += timedelta(hours=1)
-        else:
-            start += timedelta(days=1)
-    y = [
-        len([y for y in yats 
-            if y['date'].year == p.year 
-              and y['date'].month == p.month 
-              and y['date'].day == p.day
-              and (not hourly or y['date'].hour == p.hour)])
-        for p in x]
+def time_chart_figure(ds, start, end, bucket='day', by_length=False):
+    """ bar chart of the number of yats bought per bucket ('minute', 'hour', 'day' or 'week') between the start and end dates """
+    width = BUCKET_WIDTHS[bucket]
+    start, end = day_range(start, end)
+    counts = bucket_counts(ds, start, end, width, by_length=by_length)
+    x = (start + width * np.arange(counts.shape[-1])).astype('datetime64[s]')
+    # bars are sized in days on a date axis
+    bar_width = width / 86400 * (0.95 if width >= 86400 else 1)
     fig, ax = plt.subplots()
-    ax.bar(x, y, width=1/24 if hourly else 0.95)
+    if by_length:
+        bottom = np.zeros(counts.shape[1], dtype=np.int64)
+        for n in range(1, counts.shape[0]):
+            if counts[n].any():
+                ax.bar(x, counts[n], width=bar_width, bottom=bottom, label='{}x yats'.format(n))
+                bottom += counts[n]
+        fig.legend(loc='center right')
+    else:
+        ax.bar(x, counts, width=bar_width)
     ax.xaxis_date()
     fig.autofmt_xdate()
-    fig.suptitle("Number of Yats bought per {}".format('hour' if hourly else 'day'))
-    plt.show()
+    fig.suptitle("Number of Yats bought per {}".format(bucket))
+    return fig
+
+def top_bookends(ds):
+    first = ds.at(0)
+    print_top(top_ids(ds, first[first == ds.at(-1)], n=20))
+
+def top_double_bookends(ds, exclude_same=False):
+    e = ds.emojis
+    mask = (ds.lengths == 5) & (e[:, 0] == e[:, 4]) & (e[:, 1] == e[:, 3])
+    if exclude_same:
+        mask &= e[:, 0] != e[:, 1]
+    # one int per pair of emojis
+    pairs = e[mask, 0].astype(np.int64) * len(ds.vocab) + e[mask, 1]
+    print_top([(ds.vocab[p // len(ds.vocab)] + ds.vocab[p % len(ds.vocab)], cnt) for p, cnt in most_common(pairs, n=20)])
+
+def top_bookended(ds):
+    e = ds.emojis
+    mask_3 = (ds.lengths == 3) & (e[:, 0] == e[:, 2])
+    mask_5 = (ds.lengths == 5) & (e[:, 0] == e[:, 4]) & (e[:, 1] == e[:, 3])
+    # in purchase order, like the emojis list of the per-yat loop
+    ids = np.where(mask_3, e[:, 1], np.where(mask_5, e[:, 2], -1))
+    print_top(top_ids(ds, ids, n=20))
 
-def top_bookends(yats):
-    emojis = []
-    for y in yats:
-        split = split_yat(y['emoji_id'])
-        if split[0]==split[-1]:
-            emojis.append(split[0])
-    print_top(emojis, n=20)
-
-def top_double_bookends(yats, exclude_same=False):
-    emojis = []
-    for y in yats:
-        split = split_yat(y['emoji_id'])
-        if len(split) != 5: continue
-        if split[0]==split[-1] and split[1]==split[-2] and (not exclude_same or split[0]!=split[1]):
-            emojis.append(''.join(split[0:2]))
-    print_top(emojis, n=20)
-
-def top_bookended(yats):
-    emojis = []
-    for y in yats:
-        split = split_yat(y['emoji_id'])
-        if len(split)==3 and split[0]==split[-1]:
-            emojis.append(split[1])
-        if len(split)==5 and split[0]==split[-1] and split[1]==split[-2]:
-            emojis.append(split[2])
-    print_top(emojis, n=20)
-
-def top_adoptable_emojis(yats):
-    emojis = []
-    for y in yats:
-        adopt_score = 0
-        if '👖' in y['emoji_id']: adopt_score+=1
-        if '👟' in y['emoji_id']: adopt_score+=1
-        if '👕' in y['emoji_id']: adopt_score+=1
-        if '👞' in y['emoji_id']: adopt_score+=1
-        if adopt_score < 2:
-            continue
-        emojis += split_yat(y['emoji_id'])
-    print_top(emojis)
+def top_adoptable_emojis(ds):
+    adopt_score = np.zeros(len(ds), dtype=np.int8)
+    for emo in ('👖', '👟', '👕', '👞'):
+        if emo in ds.vocab:
+            adopt_score += (ds.emojis == ds.vocab.index(emo)).any(axis=1)
+    print_top(top_ids(ds, ds.emojis[adopt_score >= 2].ravel()))
 
 def gen_stats():
     start = date(2021, 5, 12)
     end = date(2021, 8, 31)
-    yats = load_yats(start, end)
-    total_cnt = len(yats)
-    cnt_3 = get_count_by_length(yats, 3)
-    cnt_4 = get_count_by_length(yats, 4)
-    cnt_5 = get_count_by_length(yats, 5)
-    avg_rs = round(sum([y['rs'] for y in yats])/len(yats), 2)
-    cnt_rs_90 = len([True for y in yats if y['rs'] >= 90])
+    db = open_db()
+    ds = load_yats(start, end, db)
+    total_cnt = len(ds)
+    by_length = count_by_length(db, *day_range(start, end))
+    cnt_3 = by_length.get(3, 0)
+    cnt_4 = by_length.get(4, 0)
+    cnt_5 = by_length.get(5, 0)
+    avg_rs = round(float(ds.rs.mean()), 2)
+    cnt_rs_90 = int(np.count_nonzero(ds.rs >= 90))
     print('Between {} and {}, **{}** yats have been created!'.format(start, end, total_cnt))
     print('**{}** were 3 emojis, **{}** were 4 emojis and **{}** were 5 emojis.'.format(cnt_3, cnt_4, cnt_5))
     print('Average Rhythm Score was **{}**, with **{}** yats above RS90'.format(avg_rs, cnt_rs_90))
-    emojis = split_yats(yats)
     print("\n**==== Emojis Leaderboard ====**\n")
-    print_top(emojis)
+    print_top(top_emojis(db, *day_range(start, end)))
     print("\n**==== RS Leaderboard ====**\n")
-    print_top_by_rs(yats)
-    create_rs_chart(yats)
-    time_chart(yats, start, end)
+    print_top_by_rs(ds)
+    create_rs_chart(ds)
+    time_chart(ds, start, end)
 
 if __name__ == "__main__":
     #gen_stats()
-    #export_csv(yats)
+    #export('stats.csv.gz')
     #exit()
     start = date(2020, 5, 1)
     end = date(2022, 8, 30)
-    yats = load_yats(start, end)
-    top_bookended(yats)
+    ds = load_yats(start, end)
+    top_bookended(ds)
@@ -0,0 +1,83 @@
+import logging
+from datetime import datetime
+
+LIVEFEED = 0
+OPENSEA_FEED = 1
+
+def shard_of(guild_id, shard_count):
+    # https://discord.com/developers/docs/topics/gateway#sharding
+    return (guild_id >> 22) % shard_count
+
+class SubscriptionRegistry:
+    """ channels subscribed to each feed, one row per (channel, feed) in feed_subscriptions.
+        only the channels of the shards this process runs are loaded, so every process (or AutoShardedBot)
+        fans out to its own guilds """
+
+    def __init__(self, bot, db):
+        self.bot = bot
+        self.db = db
+        # feed type -> {channel id: channel}
+        self.channels = {LIVEFEED: {}, OPENSEA_FEED: {}}
+
+    def local_shards(self):
+        """ (shard ids of this process, shard count), or None if the bot isn't sharded """
+        shard_count = self.bot.shard_count
+        if not shard_count or shard_count == 1:
+            return None
+        shard_ids = getattr(self.bot, 'shard_ids', None)
+        if shard_ids is None:
+            shard_ids = [self.bot.shard_id] if self.bot.shard_id is not None else range(shard_count)
+        return list(shard_ids), shard_count
+
+    def load(self):
+        shards = self.local_shards()
+        q = "SELECT channel_id, feed_type, guild_id FROM feed_subscriptions WHERE enabled=1"
+        args = ()
+        if shards is not None:
+            shard_ids, shard_count = shards
+            # subscriptions from before the registry have no guild yet, whichever process finds the channel fills it
+            q += " AND (guild_id IS NULL OR (guild_id >> 22) % ? IN ({}))".format(', '.join('?' * len(shard_ids)))
+            args = (shard_count, *shard_ids)
+        missing = []
+        guilds = []
+        for chan_id, feed_type, guild_id in self.db.fetchall_sync(q, args):
+            chan = self.bot.get_channel(chan_id)
+            if chan is None:
+                # legacy rows of other shards aren't in our cache either, only disable the ones we should have
+                if guild_id is not None or shards is None:
+                    missing.append((chan_id,))
+                continue
+            if guild_id is None:
+                guilds.append((chan.guild.id, chan_id))
+                if shards is not None and shard_of(chan.guild.id, shards[1]) not in shards[0]:
+                    continue
+            self.channels[feed_type][chan_id] = chan
+        if missing:
+            self.db.execute("UPDATE feed_subscriptions SET enabled=0 WHERE channel_id=?", missing, many=True)
+        if guilds:
+            self.db.execute("UPDATE feed_subscriptions SET guild_id=? WHERE channel_id=?", guilds, many=True)
+        logging.info("Loaded feed subscriptions: {} livefeeds, {} opensea feeds, {} channels disabled".format(
+            len(self.channels[LIVEFEED]), len(self.channels[OPENSEA_FEED]), len(missing)))
+
+    def get(self, feed_type):
+        return self.channels[feed_type].values()
+
+    def subscribe(self, channel, creator, feed_type):
+        # registering a channel twice only updates its row
+        self.channels[feed_type][channel.id] = channel
+        self.db.execute("""INSERT INTO feed_subscriptions (channel_id, feed_type, guild_id, creator_id, created_date, enabled)
+            VALUES (?, ?, ?, ?, ?, 1)
+            ON CONFLICT (channel_id, feed_type) DO UPDATE SET enabled=1, guild_id=excluded.guild_id, creator_id=excluded.creator_id""",
+            (channel.id, feed_type, channel.guild.id, creator.id, datetime.now().isoformat()))
+
+    def unsubscribe(self, channel, feed_type):
+        if self.channels[feed_type].pop(channel.id, None) is None:
+            return False, "No active livefeed in this channel"
+        self.db.execute("UPDATE feed_subscriptions SET enabled=0 WHERE channel_id=? AND feed_type=?", (channel.id, feed_type))
+        return True, ''
+
+    def disable(self, channel):
+        """ every feed of a channel that was deleted or can't be sent to anymore """
+        for channels in self.channels.values():
+            channels.pop(channel.id, None)
+        self.db.execute("UPDATE feed_subscriptions SET enabled=0 WHERE channel_id=?", (channel.id,))
@@ -1,8 +1,41 @@
 import regex
+from functools import lru_cache
 from urllib.parse import urlparse, unquote
 
+FE0F = b'\xef\xb8\x8f'.decode()
+FE0E = '\ufe0e'
+# variation selectors only change how an emoji is displayed (emoji or text style), not which emoji it is
+PRESENTATION_SELECTORS = str.maketrans('', '', FE0E + FE0F)
+
+def strip_selectors(s):
+    return s.translate(PRESENTATION_SELECTORS)
+
+GRAPHEME = regex.compile(r'\X', regex.U)
+
+@lru_cache(maxsize=65536)
 def split_yat(yat):
-    return regex.findall(r'\X', yat, regex.U)
+    """ emojis (grapheme clusters) of yat. results are cached, so it returns a tuple that can't be modified """
+    return tuple(GRAPHEME.findall(yat))
+
+def split_many(yats):
+    """ split_yat for many yats at once, in a single regex pass """
+    yats = list(yats)
+    todo = list(dict.fromkeys(y for y in yats if '\n' not in y and '\r' not in y))
+    # a line break is always a grapheme boundary, so the yats can be split joined by line breaks
+    graphemes = GRAPHEME.findall('\n'.join(todo))
+    splits = {}
+    current = []
+    i = 0
+    for g in graphemes:
+        if g == '\n':
+            splits[todo[i]] = tuple(current)
+            current = []
+            i += 1
+        else:
+            current.append(g)
+    if todo:
+        splits[todo[i]] = tuple(current)
+    return [splits[y] if y in splits else split_yat(y) for y in yats]
 
 def get_yat_from_url(url):
     return unquote(urlparse(url).path).replace('/', '')